@@ -47,6 +47,35 @@ class Config:
             'auto_save_interval': 30,  # Sekunden
             'demo_slide_duration': 5   # Sekunden
         }
+        
+        # Web-Server-Konfiguration (Tablet-Fernsteuerung)
+        self.web = {
+            'sse_keepalive_interval': 15,  # Sekunden ohne Event bis Keepalive-Kommentar
+            'sse_retry_ms': 3000,          # Reconnect-Wartezeit für EventSource-Clients
+            'long_poll_timeout': 25,       # Sekunden, max. Haltezeit für /api/current_slide?since=
+            'gzip_min_size': 1024,         # Bytes, kleinere dynamische Antworten bleiben unkomprimiert
+            'keepalive_timeout': 15,       # Sekunden Leerlauf bis eine Keep-Alive-Verbindung schließt
+            'keepalive_max_requests': 100, # Anfragen pro Verbindung, danach 'Connection: close'
+            'engine': 'threaded',          # 'threaded' (Thread pro Verbindung), 'pool' oder 'asyncio'
+            'pool_workers': 32,            # Feste Worker-Threads im 'pool'-Modus
+            'pool_queue_size': 64,         # Wartende Verbindungen, darüber sofort 503
+            'pool_max_streams': 16,        # Worker, die SSE/WebSocket/Long-Polls dauerhaft belegen dürfen
+            'retry_after': 2,              # Sekunden für den Retry-After-Header bei 503
+            'async_executor_workers': 8,   # Threads für kurze Anfragen und GUI-Callbacks im 'asyncio'-Modus
+            'image_variant_widths': [320, 640, 960, 1280, 1920],  # Pixelbreiten für /api/image/<name>?w=
+            'image_variant_quality': 80,   # WebP/JPEG-Qualität der Bild-Varianten
+            'image_variant_workers': 2,    # Prozesse für das Verkleinern von Bildern
+            'render_default_width': 1280,  # Pixelbreite für /api/slide/<id>/render.png ohne ?w=
+            'render_cache_size': 32,       # Gerenderte Slide-PNGs im Speicher (LRU)
+            'change_log_size': 256,        # Einträge im Änderungsprotokoll für /api/changes
+            'command_coalesce_ms': 80,     # Fenster, in dem Navigationsbefehle zu einem goto verschmelzen
+            'response_cache': True,        # Serialisierte JSON-Antworten cachen (False nur für Lasttest-Vergleiche)
+            'rooms': [],                   # Weitere Stände unter /r/<raum>/, Inhalt in data/rooms/<raum>/slides.json
+            'broadcast_buffer_size': 64,   # Events pro SSE-Client im Puffer, läuft er über wird der Client getrennt
+            'switch_lead_ms': 150,         # Vorlauf: Tablets und Hauptdisplay schalten gemeinsam zu switch_at um
+            'control_rate': 5.0,           # Steuerbefehle pro Sekunde und Client-IP (0 = kein Limit)
+            'control_burst': 15            # Befehle, die ein Client am Stück senden darf (schnelles Wischen)
+        }
 
 # Globale Konfigurationsinstanz
 config = Config()
\ No newline at end of file
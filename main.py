@@ -254,6 +254,8 @@ def main():
     parser.add_argument('--no-hardware', action='store_true', help='Ohne Hardware-Verbindungen starten')
     parser.add_argument('--no-web', action='store_true', help='Web-Server nicht automatisch starten')
     parser.add_argument('--web-port', type=int, default=8080, help='Web-Server Port (Standard: 8080)')
+    parser.add_argument('--web-engine', choices=['threaded', 'pool', 'asyncio'],
+                        help='Web-Server Engine (Standard: threaded)')
     parser.add_argument('--debug', action='store_true', help='Debug-Modus aktivieren')
     parser.add_argument('--text-mode', action='store_true', help='Textmodus ohne GUI starten')
     
@@ -270,6 +272,10 @@ def main():
         web_server.port = args.web_port
         logger.info(f"Web-Server Port geändert: {args.web_port}")
     
+    if args.web_engine:
+        web_server.engine = args.web_engine
+        logger.info(f"Web-Server Engine: {args.web_engine}")
+    
     logger.info("🚀 Dynamic Messe Stand V4 wird gestartet...")
     logger.info(f"Python Version: {sys.version}")
     logger.info(f"Arbeitsverzeichnis: {os.getcwd()}")
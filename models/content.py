@@ -15,8 +15,11 @@ from core.storage import storage_manager
 class SlideData:
     """Класс для представления данных слайда с поддержкой медиа"""
     
-    def __init__(self, slide_id, title="", content="", layout="text", config_data=None, extra_data=None):
+    def __init__(self, slide_id, title="", content="", layout="text", config_data=None, extra_data=None,
+                 slides_dir=None):
         self.slide_id = slide_id
+        # Каталог slides/ хранилища, которому принадлежит слайд
+        self.slides_dir = slides_dir or os.path.join("data", "slides")
         self.title = title
         self.content = content
         self.layout = layout  # text, image, mixed, custom
@@ -30,7 +33,7 @@ class SlideData:
     
     def ensure_slide_directory(self):
         """Создает директорию для слайда если она не существует"""
-        slide_dir = os.path.join("data", "slides", f"slide_{self.slide_id}")
+        slide_dir = self.get_slide_directory()
         os.makedirs(slide_dir, exist_ok=True)
         
         # Create images subdirectory
@@ -41,7 +44,7 @@ class SlideData:
     
     def get_slide_directory(self):
         """Возвращает путь к директории слайда"""
-        return os.path.join("data", "slides", f"slide_{self.slide_id}")
+        return os.path.join(self.slides_dir, f"slide_{self.slide_id}")
     
     def get_images_directory(self):
         """Возвращает путь к директории изображений слайда"""
@@ -177,7 +180,7 @@ class SlideData:
         }
     
     @classmethod
-    def from_dict(cls, data):
+    def from_dict(cls, data, slides_dir=None):
         """Создание объекта из словника"""
         slide = cls(
             data.get('slide_id', 1),
@@ -185,7 +188,8 @@ class SlideData:
             data.get('content', ''),
             data.get('layout', 'text'),
             data.get('config_data', {}),
-            data.get('extra_data', {})
+            data.get('extra_data', {}),
+            slides_dir
         )
         
         # Восстановление времени
@@ -204,7 +208,11 @@ class SlideData:
 class ContentManager:
     """Централизованный менеджер контента с расширенными возможностями"""
     
-    def __init__(self):
+    def __init__(self, data_dir="data"):
+        # "data" - основная презентация, другие каталоги - отдельные комнаты веб-сервера
+        self.data_dir = data_dir
+        # Каталоги slide_N лежат в хранилище, комната не трогает файлы основной презентации
+        self.slides_dir = os.path.join(data_dir, "slides")
         self.slides = {}
         self.content_observers = []  # Для уведомления об изменениях
         self.backup_enabled = True
@@ -223,7 +231,10 @@ class ContentManager:
             "data",
             "data/slides", 
             "data/images",
-            "data/backups"
+            "data/backups",
+            self.data_dir,
+            self.slides_dir,
+            os.path.join(self.data_dir, "backups")
         ]
         
         for directory in directories:
@@ -233,15 +244,20 @@ class ContentManager:
         """Загрузка контента по умолчанию"""
         default_slides = {
             1: SlideData(1, "BumbleB - Das automatisierte Shuttle", 
-                        "Schonmal ein automatisiert Shuttle gesehen, das aussieht wie eine Hummel?\n\nShuttle fährt los von Bushaltestelle an Bahnhof...", "text"),
+                        "Schonmal ein automatisiert Shuttle gesehen, das aussieht wie eine Hummel?\n\nShuttle fährt los von Bushaltestelle an Bahnhof...", "text",
+                        slides_dir=self.slides_dir),
             2: SlideData(2, "BumbleB - Wie die Hummel fährt",
-                        "Wie die Hummel ihre Flügel nutzt, so nutzt unser BumbleB innovative Technologie für autonomes Fahren.", "text"),
+                        "Wie die Hummel ihre Flügel nutzt, so nutzt unser BumbleB innovative Technologie für autonomes Fahren.", "text",
+                        slides_dir=self.slides_dir),
             3: SlideData(3, "Einsatzgebiete und Vorteile",
-                        "Vielseitige Einsatzmöglichkeiten in urbanen Gebieten für nachhaltigen Transport.", "text"),
+                        "Vielseitige Einsatzmöglichkeiten in urbanen Gebieten für nachhaltigen Transport.", "text",
+                        slides_dir=self.slides_dir),
             4: SlideData(4, "Sicherheitssysteme",
-                        "Moderne Sicherheitssysteme gewährleisten maximale Sicherheit für alle Passagiere.", "text"),
+                        "Moderne Sicherheitssysteme gewährleisten maximale Sicherheit für alle Passagiere.", "text",
+                        slides_dir=self.slides_dir),
             5: SlideData(5, "Nachhaltigkeit & Umwelt",
-                        "Nachhaltiger Transport für eine grüne Zukunft - umweltfreundlich und effizient.", "text")
+                        "Nachhaltiger Transport für eine grüne Zukunft - umweltfreundlich und effizient.", "text",
+                        slides_dir=self.slides_dir)
         }
         
         for slide_id, slide_data in default_slides.items():
@@ -274,7 +290,7 @@ class ContentManager:
     def update_slide_content(self, slide_id, title, content, extra_data=None):
         """Обновление контента слайда с улучшенной обработкой"""
         if slide_id not in self.slides:
-            self.slides[slide_id] = SlideData(slide_id)
+            self.slides[slide_id] = SlideData(slide_id, slides_dir=self.slides_dir)
         
         slide = self.slides[slide_id]
         slide.title = title
@@ -302,7 +318,7 @@ class ContentManager:
         if slide_id in self.slides:
             logger.warning(f"Slide {slide_id} already exists, updating instead")
         
-        self.slides[slide_id] = SlideData(slide_id, title, content, layout)
+        self.slides[slide_id] = SlideData(slide_id, title, content, layout, slides_dir=self.slides_dir)
         self.save_slide(slide_id)
         self.notify_observers(slide_id, self.slides[slide_id])
         
@@ -349,7 +365,8 @@ class ContentManager:
             source_slide.content,
             source_slide.layout,
             source_slide.config_data.copy(),
-            {}  # Start with empty extra_data, will copy images below
+            {},  # Start with empty extra_data, will copy images below
+            self.slides_dir
         )
         
         # Copy images
@@ -397,11 +414,11 @@ class ContentManager:
             return False
         
         slide = self.slides[old_id]
+        old_dir = slide.get_slide_directory()
         slide.slide_id = new_id
         
         # Move slide directory
-        old_dir = os.path.join("data", "slides", f"slide_{old_id}")
-        new_dir = os.path.join("data", "slides", f"slide_{new_id}")
+        new_dir = slide.get_slide_directory()
         
         if os.path.exists(old_dir):
             try:
@@ -456,7 +473,7 @@ class ContentManager:
     def save_to_file(self, filepath=None):
         """Сохранение всех слайдов в файл"""
         if not filepath:
-            filepath = os.path.join("data", "slides.json")
+            filepath = os.path.join(self.data_dir, "slides.json")
         
         # Create backup if enabled
         if self.backup_enabled and os.path.exists(filepath):
@@ -490,7 +507,7 @@ class ContentManager:
     def create_backup(self, filepath):
         """Создание резервной копии"""
         try:
-            backup_dir = os.path.join("data", "backups")
+            backup_dir = os.path.join(self.data_dir, "backups")
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_file = os.path.join(backup_dir, f"slides_backup_{timestamp}.json")
             
@@ -525,7 +542,7 @@ class ContentManager:
     def load_from_file(self, filepath=None):
         """Загрузка слайдов из файла"""
         if not filepath:
-            filepath = os.path.join("data", "slides.json")
+            filepath = os.path.join(self.data_dir, "slides.json")
         
         if not os.path.exists(filepath):
             logger.debug(f"Slides file not found: {filepath}")
@@ -539,7 +556,7 @@ class ContentManager:
                 self.slides.clear()
                 for slide_id_str, slide_data in data['slides'].items():
                     slide_id = int(slide_id_str)
-                    self.slides[slide_id] = SlideData.from_dict(slide_data)
+                    self.slides[slide_id] = SlideData.from_dict(slide_data, self.slides_dir)
                 
                 logger.info(f"Loaded {len(self.slides)} slides from {filepath}")
                 
@@ -621,7 +638,8 @@ class ContentManager:
     def cleanup_orphaned_files(self):
         """Очистка файлов-сирот (изображения без ссылок)"""
         try:
-            slides_dir = os.path.join("data", "slides")
+            # Только свой каталог, ссылки комнаты не покрывают изображения основной презентации
+            slides_dir = self.slides_dir
             if not os.path.exists(slides_dir):
                 return
             
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+asyncio-Engine für den Remote-Präsentations-Webserver
+Ein Event-Loop-Thread trägt alle Keep-Alive-, SSE-, Long-Poll- und WebSocket-Verbindungen
+"""
+
+import asyncio
+import functools
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.client import parse_headers
+from urllib.parse import urlparse, parse_qs
+
+from core.logger import logger
+from core.config import config
+from services.websocket import AsyncWebSocketConnection, WebSocketError, compute_accept_key
+from services.web_metrics import web_metrics
+
+def _frame_chunk(data, chunked):
+    """Frame a piece of a streamed body as chunk if required"""
+    if chunked:
+        return f"{len(data):X}\r\n".encode('ascii') + data + b'\r\n'
+    return data
+
+def _simple_response(status, reason, body, extra_headers=()):
+    """Build a complete small response with Content-Length"""
+    head = [f"HTTP/1.1 {status} {reason}", "Content-Type: text/plain", f"Content-Length: {len(body)}"]
+    head.extend(extra_headers)
+    return ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body
+
+class _BufferedRequest:
+    """A complete raw request handed to the classic request handler"""
+
+    def __init__(self, raw_request, requests_handled, received):
+        self.raw_request = raw_request
+        self.requests_handled = requests_handled
+        # Server time in ms when the event loop read the request
+        self.received = received
+
+class BufferedHandlerMixin:
+    """Runs a BaseHTTPRequestHandler against in-memory buffers instead of a socket"""
+
+    def setup(self):
+        self.connection = None
+        self.rfile = io.BytesIO(self.request.raw_request)
+        self.wfile = io.BytesIO()
+        self.pending_file = None
+        # Continue the per-connection count of the event loop side
+        self.requests_handled = self.request.requests_handled - 1
+
+    def handle(self):
+        # Exactly one request, keep-alive is driven by the event loop
+        self.handle_one_request()
+
+    def finish(self):
+        pass
+
+    def request_received_time(self):
+        # Executor queueing happens after arrival and counts as server time
+        return self.request.received
+
+    def wait_for_long_poll(self, since, timeout):
+        # Already awaited on the event loop before the request got here
+        pass
+
+    def send_file(self, path, offset, count):
+        # Sent by the event loop after the buffered head, zero-copy where possible
+        if not self.head_only and count > 0:
+            self.pending_file = (path, offset, count)
+
+class _LoopSubscriber:
+    """Broadcast subscriber that forwards server events into the event loop"""
+
+    def __init__(self, loop, callback):
+        self.loop = loop
+        self.callback = callback
+
+    def offer(self, event):
+        # Per-stream buffers on the loop side are bounded, this hop never fills up
+        try:
+            self.loop.call_soon_threadsafe(self.callback, event)
+        except RuntimeError:
+            # Loop already closed during shutdown
+            pass
+        return True
+
+    def close(self):
+        self.offer(None)
+
+class _RoomChannel:
+    """Event-loop side of one room: long-poll wakeup and open event streams"""
+
+    def __init__(self, room):
+        self.room = room
+        self.state_changed = asyncio.Event()
+        # Event stream queue -> writer of its connection
+        self.event_streams = {}
+        self.subscriber = None
+
+class AsyncHTTPServer:
+    """HTTP Server auf Basis von asyncio-Streams mit der Routen-Logik von PresentationRequestHandler"""
+
+    def __init__(self, server_address, handler_class, presentation):
+        self.handler_class = handler_class
+        self.buffered_handler_class = type(
+            f"Buffered{handler_class.__name__}", (BufferedHandlerMixin, handler_class), {})
+        self.presentation = presentation
+
+        # Short requests and GUI callbacks run here, never on the event loop
+        self.executor_workers = config.web['async_executor_workers']
+        self.executor = ThreadPoolExecutor(max_workers=self.executor_workers, thread_name_prefix='web-async')
+
+        self.loop = asyncio.new_event_loop()
+        self.stopped = threading.Event()
+        self.connections = set()
+        # Room name -> channel, subscribed to the room's events on first use
+        self.channels = {}
+        self.websockets = 0
+        self.evicted_streams = 0
+        self.closing = False
+
+        # Bind synchronously so a busy port fails in start_server like the other engines
+        host, port = server_address
+        self.server = self.loop.run_until_complete(
+            asyncio.start_server(self.handle_connection, host, port, reuse_address=True))
+        self.server_address = self.server.sockets[0].getsockname()[:2]
+
+        self.get_channel(presentation.default_room)
+
+    def serve_forever(self):
+        """Run the event loop until shutdown() is called"""
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.stopped.set()
+
+    def shutdown(self):
+        """Close all connections and stop the event loop from another thread"""
+        if self.loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(self._close_all(), self.loop).result(timeout=5)
+            except Exception as e:
+                logger.debug(f"Async web server did not close cleanly: {e}")
+
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.stopped.wait(timeout=5)
+
+    def server_close(self):
+        """Release the listening socket, the loop and the executor"""
+        for channel in self.channels.values():
+            channel.room.unsubscribe_events(channel.subscriber)
+        self.server.close()
+        self.loop.close()
+        self.executor.shutdown(wait=False)
+
+    async def _close_all(self):
+        """End streams and close connections while the loop is still running"""
+        self.closing = True
+        self.server.close()
+
+        # Ends SSE streams and wakes long-polls
+        stream_writers = set()
+        for channel in list(self.channels.values()):
+            self._dispatch_event(channel, None)
+            stream_writers.update(channel.event_streams.values())
+
+        # Idle keep-alive and WebSocket readers fail once their transport is closed,
+        # event streams close their connection after the final chunk
+        for writer in list(self.connections):
+            if writer not in stream_writers:
+                writer.close()
+
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=2)
+            for task in pending:
+                task.cancel()
+
+    def get_channel(self, room):
+        """Channel of a room, subscribing to the room's events on first use"""
+        channel = self.channels.get(room.name)
+        if channel is None:
+            channel = self.channels[room.name] = _RoomChannel(room)
+            channel.subscriber = _LoopSubscriber(self.loop, functools.partial(self._dispatch_event, channel))
+            room.subscribe_events(channel.subscriber)
+        return channel
+
+    def _dispatch_event(self, channel, event):
+        """Wake long-polls and feed event streams of one room (runs on the event loop)"""
+        # Waiters hold the old event object, swapping avoids lost wakeups
+        state_changed = channel.state_changed
+        channel.state_changed = asyncio.Event()
+        state_changed.set()
+
+        for stream, writer in list(channel.event_streams.items()):
+            try:
+                stream.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow tablet: drop it instead of buffering without bound, it resyncs on reconnect
+                del channel.event_streams[stream]
+                self.evicted_streams += 1
+                writer.transport.abort()
+
+    async def handle_connection(self, reader, writer):
+        """Serve keep-alive requests on one connection"""
+        peer = writer.get_extra_info('peername') or ('', 0)
+        self.connections.add(writer)
+        requests_handled = 0
+
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+
+                requests_handled += 1
+                if not await self.dispatch(request, reader, writer, peer, requests_handled):
+                    break
+
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.error(f"Error in async connection handler: {e}")
+        finally:
+            self.connections.discard(writer)
+            writer.close()
+
+    async def _read_request(self, reader):
+        """Read one request head and body, None if the connection went idle or closed"""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), config.web['keepalive_timeout'])
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            return None
+        # Receive timestamp for /api/time, same base as server_time_ms()
+        received = time.time() * 1000
+
+        request_line, _, header_block = head.partition(b'\r\n')
+        parts = request_line.decode('latin-1').split()
+        headers = parse_headers(io.BytesIO(header_block))
+
+        content_length = int(headers.get('Content-Length', 0) or 0)
+        body = await reader.readexactly(content_length) if content_length else b''
+
+        method, target, version = parts if len(parts) == 3 else ('', '', '')
+        return {
+            'raw': head + body,
+            'method': method,
+            'target': target,
+            'version': version,
+            'headers': headers,
+            'received': received
+        }
+
+    async def dispatch(self, request, reader, writer, peer, requests_handled):
+        """Route a request, returns False if the connection must be closed"""
+        parsed_path = urlparse(request['target'])
+        room, path = self.presentation.split_room_path(parsed_path.path)
+
+        # Unknown rooms fall through, the handler answers 404
+        if request['method'] == 'GET' and room is not None:
+            if path == '/api/events':
+                await self.serve_event_stream(writer, request['version'], self.get_channel(room))
+                return False
+            if path == '/ws':
+                return await self.handle_websocket(reader, writer, request['headers'], room, peer[0])
+            if path == '/api/current_slide':
+                try:
+                    long_poll = self.handler_class.parse_long_poll(parse_qs(parsed_path.query))
+                except ValueError:
+                    # Invalid parameters, the handler answers 400
+                    long_poll = None
+                if long_poll:
+                    await self.wait_for_state_change(self.get_channel(room), *long_poll)
+
+        response, close_connection, pending_file = await self.loop.run_in_executor(
+            self.executor, self._run_handler, request, peer, requests_handled)
+        writer.write(response)
+        if pending_file:
+            path, offset, count = pending_file
+            with open(path, 'rb') as f:
+                await self.loop.sendfile(writer.transport, f, offset, count)
+        await writer.drain()
+        return not close_connection
+
+    def _run_handler(self, request, peer, requests_handled):
+        """Process one buffered request with the classic handler (executor thread)"""
+        buffered = _BufferedRequest(request['raw'], requests_handled, request['received'])
+        handler = self.buffered_handler_class(buffered, peer, self)
+        return handler.wfile.getvalue(), handler.close_connection, handler.pending_file
+
+    async def wait_for_state_change(self, channel, since, timeout):
+        """Await a new state version of a room without occupying a thread"""
+        deadline = self.loop.time() + timeout
+        while channel.room.state_version == since and not self.closing:
+            remaining = deadline - self.loop.time()
+            if remaining <= 0:
+                break
+
+            state_changed = channel.state_changed
+            try:
+                await asyncio.wait_for(state_changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+
+    async def serve_event_stream(self, writer, version, channel):
+        """Stream navigation and content events of a room as Server-Sent Events"""
+        chunked = version != 'HTTP/1.0'
+        head = [
+            "HTTP/1.1 200 OK",
+            "Content-Type: text/event-stream; charset=utf-8",
+            "Cache-Control: no-cache",
+            "Access-Control-Allow-Origin: *",
+            "Transfer-Encoding: chunked" if chunked else "Connection: close"
+        ]
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+        # Streams never reach the classic handler, count them here
+        web_metrics.observe_request('GET', '/api/events', 200, None, 0)
+
+        stream = asyncio.Queue(maxsize=config.web['broadcast_buffer_size'])
+        channel.event_streams[stream] = writer
+        try:
+            writer.write(_frame_chunk(f"retry: {config.web['sse_retry_ms']}\n\n".encode('utf-8'), chunked))
+            await writer.drain()
+
+            keepalive_interval = config.web['sse_keepalive_interval']
+            while self.presentation.running:
+                try:
+                    event = await asyncio.wait_for(stream.get(), keepalive_interval)
+                except asyncio.TimeoutError:
+                    writer.write(_frame_chunk(b': keepalive\n\n', chunked))
+                    await writer.drain()
+                    continue
+
+                if event is None:
+                    break
+
+                # Serialized once by the broadcaster for every subscriber
+                writer.write(event.chunked_frame if chunked else event.frame)
+                await writer.drain()
+
+            if chunked:
+                writer.write(b'0\r\n\r\n')
+                await writer.drain()
+
+        except ConnectionError:
+            logger.debug("Event stream client disconnected")
+        finally:
+            channel.event_streams.pop(stream, None)
+
+    async def handle_websocket(self, reader, writer, headers, room, client):
+        """Upgrade to WebSocket and handle control commands on the event loop"""
+        key = headers.get('Sec-WebSocket-Key')
+        if headers.get('Upgrade', '').lower() != 'websocket' or not key:
+            writer.write(_simple_response(400, 'Bad Request', b'WebSocket upgrade expected'))
+            web_metrics.observe_request('GET', '/ws', 400, None, 0)
+            await writer.drain()
+            return True
+
+        writer.write((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {compute_accept_key(key)}\r\n\r\n"
+        ).encode('latin-1'))
+        web_metrics.observe_request('GET', '/ws', 101, None, 0)
+
+        connection = AsyncWebSocketConnection(reader, writer)
+        self.websockets += 1
+        try:
+            while self.presentation.running:
+                message = await connection.receive()
+                if message is None:
+                    break
+
+                # Commands run GUI callbacks, keep them off the event loop
+                ack = await self.loop.run_in_executor(
+                    self.executor, self.handler_class.handle_websocket_message, message, room, client)
+                await connection.send_text(ack)
+
+        except (WebSocketError, ConnectionError, UnicodeDecodeError) as e:
+            logger.debug(f"WebSocket connection closed: {e}")
+        finally:
+            self.websockets -= 1
+            await connection.close()
+
+        return False
+
+    def get_connection_stats(self):
+        """Open connections handled by the event loop"""
+        return {
+            'open_connections': len(self.connections),
+            'event_streams': sum(len(channel.event_streams) for channel in self.channels.values()),
+            'evicted_streams': self.evicted_streams,
+            'websockets': self.websockets,
+            'executor_workers': self.executor_workers
+        }
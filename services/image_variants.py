@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Bild-Varianten für das Tablet-Interface
+Verkleinerte WebP/JPEG-Ableitungen der Creator-Bilder mit Festplatten-Cache
+"""
+
+import os
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image, ImageOps
+
+from core.logger import logger
+from core.config import config
+
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg')
+}
+
+def render_variant(source_path, target_path, width, fmt, quality):
+    """Resize and re-encode one image (runs in a worker process)"""
+    pil_format = VARIANT_FORMATS[fmt][0]
+
+    with Image.open(source_path) as img:
+        img = ImageOps.exif_transpose(img)
+
+        # Never upscale, small sources only get re-encoded
+        if img.width > width:
+            height = max(1, round(img.height * width / img.width))
+            img = img.resize((width, height), Image.LANCZOS)
+
+        if pil_format == 'JPEG' and img.mode != 'RGB':
+            # JPEG has no alpha channel, flatten onto white like the slide background
+            rgba = img.convert('RGBA')
+            img = Image.new('RGB', rgba.size, (255, 255, 255))
+            img.paste(rgba, mask=rgba.getchannel('A'))
+        elif img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA')
+
+        # Write next to the target and rename, readers never see partial files
+        temp_path = f"{target_path}.{os.getpid()}.tmp"
+        img.save(temp_path, pil_format, quality=quality, optimize=True)
+        os.replace(temp_path, target_path)
+
+    return target_path
+
+class ImageVariantService:
+    """Erzeugt und cached Bild-Varianten in einem Prozess-Pool"""
+
+    def __init__(self):
+        self.cache_dir = os.path.join("data", "image_cache")
+        self.pool = None
+        self.lock = threading.Lock()
+
+        # Laufende Erzeugungen, gleichzeitige Anfragen warten auf dasselbe Future
+        self.pending = {}
+
+        # Quell-Hash pro Datei, gültig solange mtime und Größe gleich bleiben
+        self.source_hashes = {}
+
+    def normalize_width(self, width):
+        """Round a requested width up to the next configured variant width"""
+        widths = config.web['image_variant_widths']
+        for candidate in widths:
+            if width <= candidate:
+                return candidate
+        return widths[-1]
+
+    def get_source_hash(self, source_path, stat):
+        """Content hash of a source image, computed once per file version"""
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self.source_hashes.get(source_path)
+        if cached and cached[0] == key:
+            return cached[1]
+
+        digest = hashlib.blake2b(digest_size=12)
+        with open(source_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+
+        source_hash = digest.hexdigest()
+        self.source_hashes[source_path] = (key, source_hash)
+        return source_hash
+
+    def get_variant(self, source_path, width, fmt):
+        """Return (path, content_type) of the cached variant, rendering it on first use"""
+        if fmt not in VARIANT_FORMATS:
+            raise ValueError(f"Unsupported image format: {fmt}")
+
+        width = self.normalize_width(width)
+        quality = config.web['image_variant_quality']
+        source_hash = self.get_source_hash(source_path, os.stat(source_path))
+        target_path = os.path.join(self.cache_dir, f"{source_hash}_w{width}_q{quality}.{fmt}")
+        content_type = VARIANT_FORMATS[fmt][1]
+
+        if os.path.exists(target_path):
+            return target_path, content_type
+
+        with self.lock:
+            future = self.pending.get(target_path)
+            if future is None:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                future = self._submit(source_path, target_path, width, fmt, quality)
+                self.pending[target_path] = future
+
+        try:
+            future.result()
+        finally:
+            with self.lock:
+                self.pending.pop(target_path, None)
+
+        return target_path, content_type
+
+    def _submit(self, *args):
+        """Hand a render job to the process pool, creating the pool lazily"""
+        if self.pool is None:
+            # spawn: never fork the GUI process with its running threads
+            self.pool = ProcessPoolExecutor(
+                max_workers=config.web['image_variant_workers'],
+                mp_context=multiprocessing.get_context('spawn'))
+
+        try:
+            return self.pool.submit(render_variant, *args)
+        except BrokenProcessPool:
+            logger.warning("Image variant pool broke, restarting it")
+            self.pool = None
+            return self._submit(*args)
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        with self.lock:
+            if self.pool is not None:
+                self.pool.shutdown(wait=False, cancel_futures=True)
+                self.pool = None
+
+# Globale Instanz
+image_variants = ImageVariantService()
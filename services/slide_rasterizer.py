@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Headless Slide Rasterizer für das Tablet-Interface
+Gleiche Layout-Regeln wie ui.components.slide_renderer, gezeichnet mit PIL statt Tk
+"""
+
+from functools import lru_cache
+from io import BytesIO
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Tk font sizes are points, at 96 dpi one point is 4/3 pixel
+POINT_TO_PIXEL = 96 / 72
+
+# Segoe UI like the Tk renderer, DejaVu where it is not installed
+FONT_FILES = {
+    False: ('segoeui.ttf', 'DejaVuSans.ttf', 'Arial.ttf'),
+    True: ('segoeuib.ttf', 'DejaVuSans-Bold.ttf', 'Arial Bold.ttf')
+}
+
+@lru_cache(maxsize=64)
+def load_font(point_size, bold=False):
+    """Load the slide font for a Tk point size"""
+    pixel_size = max(1, round(point_size * POINT_TO_PIXEL))
+    for font_file in FONT_FILES[bold]:
+        try:
+            return ImageFont.truetype(font_file, pixel_size)
+        except OSError:
+            continue
+    return ImageFont.load_default(pixel_size)
+
+def wrap_text(text, font, max_width):
+    """Break text into lines no wider than max_width, like Tk's create_text(width=...)"""
+    lines = []
+    for paragraph in text.split('\n'):
+        line = ''
+        for word in paragraph.split(' '):
+            candidate = f"{line} {word}" if line else word
+            if not line or font.getlength(candidate) <= max_width:
+                line = candidate
+            else:
+                lines.append(line)
+                line = word
+        lines.append(line)
+    return lines
+
+class SlideRasterizer:
+    """Rendert Slides als Bitmap im Design von SlideRenderer"""
+
+    @staticmethod
+    def draw_text(draw, x, y, text, font, fill, anchor, width=None):
+        """Draw a text block positioned like a Tk canvas text item"""
+        lines = wrap_text(text, font, width) if width else text.split('\n')
+        ascent, descent = font.getmetrics()
+        line_height = ascent + descent
+        block_width = max(font.getlength(line) for line in lines)
+        block_height = line_height * len(lines)
+
+        # Tk anchors position the whole block, lines inside stay left-justified
+        if anchor == 'center':
+            anchor = ''
+        if 'w' in anchor:
+            left = x
+        elif 'e' in anchor:
+            left = x - block_width
+        else:
+            left = x - block_width / 2
+
+        if anchor.startswith('n'):
+            top = y
+        elif anchor.startswith('s'):
+            top = y - block_height
+        else:
+            top = y - block_height / 2
+
+        for i, line in enumerate(lines):
+            draw.text((left, top + i * line_height), line, font=font, fill=fill)
+
+    @staticmethod
+    def render_slide_to_image(slide_data, canvas_width, canvas_height):
+        """Render a slide like SlideRenderer.render_slide_to_canvas, returns a PIL image"""
+        image = Image.new('RGB', (canvas_width, canvas_height), '#FFFFFF')
+        draw = ImageDraw.Draw(image)
+
+        bg_color = slide_data.get('background_color', '#FFFFFF')
+        text_color = slide_data.get('text_color', '#1F1F1F')
+        title_color = '#1E88E5'   # Bertrandt Blau
+        accent_color = '#FF6600'  # Bertrandt Orange
+
+        # Skalierung wie im Tk-Renderer
+        margin = 40
+        slide_width = 1920
+        slide_height = 1080
+
+        scale_x = (canvas_width - margin) / slide_width
+        scale_y = (canvas_height - margin) / slide_height
+        scale_factor = min(scale_x, scale_y, 1.0)
+
+        scaled_width = slide_width * scale_factor
+        scaled_height = slide_height * scale_factor
+        offset_x = (canvas_width - scaled_width) / 2
+        offset_y = (canvas_height - scaled_height) / 2
+
+        # Schatten
+        shadow_offset = max(6, int(8 * scale_factor))
+        draw.rectangle(
+            (offset_x + shadow_offset, offset_y + shadow_offset,
+             offset_x + scaled_width + shadow_offset, offset_y + scaled_height + shadow_offset),
+            fill='#D0D0D0'
+        )
+
+        # Hintergrund
+        draw.rectangle(
+            (offset_x, offset_y, offset_x + scaled_width, offset_y + scaled_height),
+            fill=bg_color, outline='#CCCCCC', width=2
+        )
+
+        # Titel
+        title = slide_data.get('title', '')
+        if title:
+            title_y = offset_y + (60 * scale_factor)
+            SlideRasterizer.draw_text(
+                draw, offset_x + scaled_width / 2, title_y, title,
+                load_font(max(20, int(28 * scale_factor)), bold=True),
+                title_color, 'center', width=scaled_width - (80 * scale_factor)
+            )
+
+            # Akzentlinie unter dem Titel
+            line_y = title_y + (40 * scale_factor)
+            draw.line(
+                (offset_x + (60 * scale_factor), line_y, offset_x + scaled_width - (60 * scale_factor), line_y),
+                fill=accent_color, width=max(3, int(4 * scale_factor))
+            )
+
+        # Inhalt
+        content = slide_data.get('content', '')
+        if content:
+            content_y_start = offset_y + (140 * scale_factor)
+            content_lines = content.replace('\n\n', '\n').split('\n')
+            line_height = max(24, int(30 * scale_factor))
+            content_font = load_font(max(10, int(14 * scale_factor)))
+
+            for i, line in enumerate(content_lines[:15]):
+                if line.strip():
+                    y_pos = content_y_start + (i * line_height)
+                    if y_pos < offset_y + scaled_height - (80 * scale_factor):
+                        display_text = f"• {line.strip()}" if not line.strip().startswith('•') else line.strip()
+
+                        SlideRasterizer.draw_text(
+                            draw, offset_x + (80 * scale_factor), y_pos, display_text,
+                            content_font, text_color, 'nw', width=scaled_width - (160 * scale_factor)
+                        )
+
+        # Branding unten rechts
+        SlideRasterizer.draw_text(
+            draw, offset_x + scaled_width - (40 * scale_factor), offset_y + scaled_height - (30 * scale_factor),
+            "BERTRANDT", load_font(max(8, int(12 * scale_factor)), bold=True), '#003366', 'se'
+        )
+
+        # Foliennummer unten links
+        slide_number = slide_data.get('slide_number', 1)
+        SlideRasterizer.draw_text(
+            draw, offset_x + (40 * scale_factor), offset_y + scaled_height - (30 * scale_factor),
+            f"Folie {slide_number}", load_font(max(6, int(10 * scale_factor))), '#666666', 'sw'
+        )
+
+        return image
+
+    @staticmethod
+    def render_slide_png(slide_data, width):
+        """Render a slide into a 16:9 PNG of the given width"""
+        image = SlideRasterizer.render_slide_to_image(slide_data, width, round(width * 9 / 16))
+        output = BytesIO()
+        image.save(output, 'PNG')
+        return output.getvalue()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Event-Verteilung für den Remote-Präsentations-Webserver
+Jedes Event wird einmal serialisiert und über begrenzte Puffer an alle Clients verteilt
+"""
+
+import json
+import queue
+import threading
+from collections import deque
+
+class BroadcastEvent:
+    """An event serialized once as Server-Sent Events frame, plain and chunk-framed"""
+    __slots__ = ('type', 'data', 'frame', 'chunked_frame')
+
+    def __init__(self, event_type, data):
+        self.type = event_type
+        self.data = data
+        payload = json.dumps(data, ensure_ascii=False)
+        self.frame = f"event: {event_type}\ndata: {payload}\n\n".encode('utf-8')
+        self.chunked_frame = f"{len(self.frame):X}\r\n".encode('ascii') + self.frame + b'\r\n'
+
+class BroadcastSubscriber:
+    """Begrenzter Event-Puffer eines Clients, läuft er über wird der Client getrennt"""
+
+    def __init__(self, max_pending):
+        self.max_pending = max_pending
+        self.pending = deque()
+        self.condition = threading.Condition(threading.Lock())
+        self.closed = False
+        self.evicted = False
+
+    def offer(self, event):
+        """Buffer an event without blocking, False if the buffer is full"""
+        with self.condition:
+            if self.closed:
+                return True
+            if len(self.pending) >= self.max_pending:
+                return False
+            self.pending.append(event)
+            self.condition.notify()
+            return True
+
+    def close(self, evicted=False):
+        """End the subscription, the consumer gets None once the buffer is drained"""
+        with self.condition:
+            self.closed = True
+            self.evicted = self.evicted or evicted
+            if evicted:
+                # An evicted client is behind anyway, it resyncs after reconnecting
+                self.pending.clear()
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        """Next event, None once closed, queue.Empty after timeout seconds without events"""
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.pending or self.closed, timeout):
+                raise queue.Empty
+            if self.pending:
+                return self.pending.popleft()
+            return None
+
+class Broadcaster:
+    """Verteilt Events an alle Abonnenten, ohne dass langsame Clients den Publisher bremsen"""
+
+    def __init__(self, max_pending):
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        # Copy-on-write, publish iterates without holding the lock
+        self.subscribers = ()
+        self.events_published = 0
+        self.deliveries = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.subscribers)
+
+    def subscribe(self, subscriber=None):
+        """Register a subscriber (anything with offer() and close()) and return it"""
+        if subscriber is None:
+            subscriber = BroadcastSubscriber(self.max_pending)
+        with self.lock:
+            self.subscribers = self.subscribers + (subscriber,)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """Remove a subscriber, unknown subscribers are ignored"""
+        with self.lock:
+            self.subscribers = tuple(s for s in self.subscribers if s is not subscriber)
+
+    def publish(self, event_type, data):
+        """Serialize an event once and offer it to every subscriber"""
+        event = BroadcastEvent(event_type, data)
+        subscribers = self.subscribers
+
+        full = [subscriber for subscriber in subscribers if not subscriber.offer(event)]
+        for subscriber in full:
+            self.unsubscribe(subscriber)
+            subscriber.close(evicted=True)
+
+        with self.lock:
+            self.events_published += 1
+            self.deliveries += len(subscribers) - len(full)
+            self.evictions += len(full)
+        return event
+
+    def close(self):
+        """Close every subscription, used when the server stops"""
+        for subscriber in self.subscribers:
+            subscriber.close()
+
+    def get_stats(self):
+        """Subscriber count and delivery counters"""
+        return {
+            'subscribers': len(self.subscribers),
+            'events_published': self.events_published,
+            'deliveries': self.deliveries,
+            'evictions': self.evictions
+        }
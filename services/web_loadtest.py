@@ -0,0 +1,635 @@
+#!/usr/bin/env python3
+"""
+Lasttest für den Remote-Präsentations-Webserver
+Startet WebPresentationServer im Prozess auf einem freien Port und simuliert N Tablets
+
+    python -m services.web_loadtest --tablets 50 --duration 30 --engine pool --output pool.json
+    python -m services.web_loadtest --broadcast-subscribers 500 --engine asyncio
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import random
+import re
+import socket
+import argparse
+import selectors
+import threading
+import multiprocessing
+import http.client
+
+from services.web_metrics import route_label
+
+# Request headers of the tablet browser
+BROWSER_HEADERS = {'Accept-Encoding': 'gzip', 'User-Agent': 'web-loadtest'}
+
+# State requests of a page load, fetched on start and after every reconnect
+PAGE_LOAD_PATHS = ('/api/bundle', '/api/current_slide')
+
+# CSS/JavaScript referenced by the page, immutable so a tablet loads them only once
+ASSET_URL_PATTERN = re.compile(rb'(?:href|src)="(/static/[^"]+)"')
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+class RouteRecorder:
+    """Latenzen, Status-Codes und Fehler pro Route eines Client-Prozesses"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+        self.events_received = 0
+
+    def _route(self, route):
+        stats = self.routes.get(route)
+        if stats is None:
+            stats = self.routes[route] = {'latencies': [], 'status': {}, 'errors': 0, 'bytes': 0}
+        return stats
+
+    def record(self, route, status, latency, size):
+        with self.lock:
+            stats = self._route(route)
+            stats['latencies'].append(latency)
+            stats['status'][str(status)] = stats['status'].get(str(status), 0) + 1
+            stats['bytes'] += size
+            if status >= 400:
+                stats['errors'] += 1
+
+    def record_error(self, route, error):
+        with self.lock:
+            stats = self._route(route)
+            stats['errors'] += 1
+            name = type(error).__name__
+            stats['status'][name] = stats['status'].get(name, 0) + 1
+
+    def count_events(self, count):
+        with self.lock:
+            self.events_received += count
+
+class ClientSignals:
+    """Stop-Flag und Reconnect-Sturm-Generation der Tablets eines Client-Prozesses"""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.storm_generation = 0
+        self.stopped = False
+
+    def wait(self, timeout, storm_seen):
+        """Sleep until timeout, stop or a storm newer than storm_seen, True once stopped"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.stopped or self.storm_generation != storm_seen, timeout)
+            return self.stopped
+
+    def trigger_storm(self):
+        with self.condition:
+            self.storm_generation += 1
+            self.condition.notify_all()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+class VirtualTablet:
+    """Ein simuliertes Tablet: Seitenaufruf, Polling, Wischen, Bilder und Reconnects"""
+
+    def __init__(self, tablet_id, host, port, settings, recorder, signals):
+        self.tablet_id = tablet_id
+        self.host = host
+        self.port = port
+        self.settings = settings
+        self.recorder = recorder
+        self.signals = signals
+        self.rng = random.Random(settings['seed'] * 100003 + tablet_id)
+        self.connection = None
+        self.slide_ids = [1]
+        self.images = {}
+        # Browser cache: immutable assets are not fetched again after a reconnect
+        self.assets_loaded = False
+
+    def connect(self):
+        self.close()
+        self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.settings['timeout'])
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def request(self, method, path, body=None):
+        """Timed request on the keep-alive connection, returns the body or None on failure"""
+        route = route_label(path)
+        headers = dict(BROWSER_HEADERS)
+        if body is not None:
+            body = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+
+        if self.connection is None:
+            self.connect()
+
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            self.recorder.record_error(route, e)
+            self.close()
+            return None
+
+        self.recorder.record(route, response.status, time.perf_counter() - started, len(data))
+        if response.status >= 400:
+            return None
+        if response.getheader('Content-Encoding') == 'gzip':
+            return gzip.decompress(data)
+        return data
+
+    def page_load(self):
+        """Fetch the page, its assets and the bundle like a freshly opened tablet"""
+        page = self.request('GET', '/')
+        if page and not self.assets_loaded:
+            for path in ASSET_URL_PATTERN.findall(page):
+                self.request('GET', path.decode('ascii'))
+            self.assets_loaded = True
+
+        for path in PAGE_LOAD_PATHS:
+            data = self.request('GET', path)
+            if path == '/api/bundle' and data:
+                self.read_bundle(json.loads(data))
+
+    def read_bundle(self, bundle):
+        """Remember slide ids and image URLs for swipes and image fetches"""
+        self.slide_ids = [slide['slide_id'] for slide in bundle['slides']] or [1]
+        self.images = {
+            slide['slide_id']: [element['web_url'] for element in slide.get('canvas_elements', [])
+                                if element.get('type') == 'image' and 'web_url' in element]
+            for slide in bundle['slides']
+        }
+
+    def swipe(self):
+        """Navigate one slide and load it with its images"""
+        action = 'next' if self.rng.random() < 0.75 else 'prev'
+        self.request('POST', '/api/control', {'action': action})
+
+        slide_id = self.rng.choice(self.slide_ids)
+        self.request('GET', f'/api/slide?id={slide_id}')
+        self.fetch_images(slide_id)
+
+    def fetch_images(self, slide_id):
+        width = self.rng.choice((640, 1280))
+        for url in self.images.get(slide_id, []):
+            self.request('GET', f'{url}&w={width}&fmt=webp')
+        if self.settings['render']:
+            self.request('GET', f'/api/slide/{slide_id}/render.png?w={width}')
+
+    def next_delay(self, mean):
+        """Exponentially distributed think time, swipes come in irregular bursts"""
+        return self.rng.expovariate(1.0 / mean) if mean > 0 else float('inf')
+
+    def run(self):
+        signals = self.signals
+        storm_seen = signals.storm_generation
+
+        # Tablets do not all open the page in the same millisecond
+        time.sleep(self.rng.uniform(0, self.settings['ramp_up']))
+        if signals.stopped:
+            return
+
+        self.page_load()
+        now = time.monotonic()
+        next_poll = now + self.rng.uniform(0, self.settings['poll_interval'])
+        next_swipe = now + self.next_delay(self.settings['swipe_interval'])
+
+        while not signals.stopped:
+            if signals.storm_generation != storm_seen:
+                # Reconnect storm: WLAN roaming or a restarted access point drops everyone at once
+                storm_seen = signals.storm_generation
+                self.close()
+                self.page_load()
+                continue
+
+            now = time.monotonic()
+            if now >= next_poll:
+                self.request('GET', '/api/current_slide')
+                next_poll = now + self.settings['poll_interval']
+            elif now >= next_swipe:
+                self.swipe()
+                next_swipe = now + self.next_delay(self.settings['swipe_interval'])
+            else:
+                signals.wait(min(next_poll, next_swipe) - now, storm_seen)
+
+        self.close()
+
+def follow_event_stream(host, port, recorder, signals):
+    """Hold an SSE connection like a tablet with EventSource and count received events"""
+    route = route_label('/api/events')
+    try:
+        sock = socket.create_connection((host, port), timeout=5)
+    except OSError as e:
+        recorder.record_error(route, e)
+        return
+
+    with sock:
+        started = time.perf_counter()
+        sock.sendall(f"GET /api/events HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n".encode('latin-1'))
+        sock.settimeout(0.5)
+        buffer = b''
+        status = None
+        while not signals.stopped:
+            try:
+                data = sock.recv(65536)
+            except socket.timeout:
+                continue
+            except OSError as e:
+                recorder.record_error(route, e)
+                return
+            if not data:
+                break
+
+            buffer += data
+            if status is None and b'\r\n' in buffer:
+                status = int(buffer.split(b' ', 2)[1])
+                recorder.record(route, status, time.perf_counter() - started, 0)
+                if status != 200:
+                    return
+            recorder.count_events(buffer.count(b'\nevent: ') + buffer.startswith(b'event: '))
+            # Keep a tail one byte shorter than the marker, it may be split across reads
+            buffer = buffer[-7:]
+
+def run_clients(host, port, tablet_ids, settings, result_queue):
+    """Client process: run the given tablets as threads until the duration is over"""
+    recorder = RouteRecorder()
+    signals = ClientSignals()
+
+    rng = random.Random(settings['seed'])
+    tablets = [VirtualTablet(tablet_id, host, port, settings, recorder, signals) for tablet_id in tablet_ids]
+    threads = [threading.Thread(target=tablet.run, daemon=True) for tablet in tablets]
+    for _ in tablet_ids:
+        if rng.random() < settings['event_streams']:
+            threads.append(threading.Thread(
+                target=follow_event_stream, args=(host, port, recorder, signals), daemon=True))
+
+    for thread in threads:
+        thread.start()
+
+    deadline = time.monotonic() + settings['duration']
+    storm_interval = settings['storm_interval']
+    next_storm = time.monotonic() + storm_interval if storm_interval > 0 else float('inf')
+    while True:
+        now = time.monotonic()
+        if now >= deadline:
+            break
+        if now >= next_storm:
+            signals.trigger_storm()
+            next_storm += storm_interval
+        time.sleep(max(0.0, min(deadline, next_storm) - now))
+    signals.stop()
+
+    for thread in threads:
+        thread.join(timeout=settings['timeout'] + 1)
+
+    result_queue.put({'routes': recorder.routes, 'events_received': recorder.events_received,
+                      'storms': signals.storm_generation})
+
+def summarize(client_results, wall_time):
+    """Merge client process results into the per-route report"""
+    merged = {}
+    for result in client_results:
+        for route, stats in result['routes'].items():
+            target = merged.setdefault(route, {'latencies': [], 'status': {}, 'errors': 0, 'bytes': 0})
+            target['latencies'].extend(stats['latencies'])
+            target['errors'] += stats['errors']
+            target['bytes'] += stats['bytes']
+            for status, count in stats['status'].items():
+                target['status'][status] = target['status'].get(status, 0) + count
+
+    routes = {}
+    total_requests = 0
+    total_errors = 0
+    for route, stats in sorted(merged.items()):
+        latencies = sorted(stats['latencies'])
+        requests = sum(stats['status'].values())
+        total_requests += requests
+        total_errors += stats['errors']
+        routes[route] = {
+            'requests': requests,
+            'throughput_rps': round(requests / wall_time, 2),
+            'errors': stats['errors'],
+            'error_rate': round(stats['errors'] / requests, 4) if requests else 0,
+            'status': stats['status'],
+            'bytes': stats['bytes'],
+            'latency_ms': {
+                'p50': _ms(percentile(latencies, 0.50)),
+                'p95': _ms(percentile(latencies, 0.95)),
+                'p99': _ms(percentile(latencies, 0.99)),
+                'max': _ms(latencies[-1] if latencies else None),
+                'mean': _ms(sum(latencies) / len(latencies) if latencies else None)
+            }
+        }
+
+    return {
+        'totals': {
+            'requests': total_requests,
+            'throughput_rps': round(total_requests / wall_time, 2),
+            'errors': total_errors,
+            'error_rate': round(total_errors / total_requests, 4) if total_requests else 0,
+            'events_received': sum(result['events_received'] for result in client_results),
+            'reconnect_storms': max((result['storms'] for result in client_results), default=0)
+        },
+        'routes': routes
+    }
+
+def _ms(seconds):
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+def start_test_server(settings, streams=0):
+    """Start the web server in this process on an ephemeral port and return it, streams = held event streams"""
+    # Imported here, spawned client processes never need the server or its content
+    from core.config import config
+    from services.web_server import web_server
+
+    config.web['response_cache'] = settings['response_cache']
+    # All simulated tablets share one client IP, a per-client limit would throttle the whole run
+    config.web['control_rate'] = 0
+    if streams and settings['engine'] == 'pool':
+        # Each stream pins a worker, keep the usual workers free for the other requests
+        config.web['pool_max_streams'] = max(config.web['pool_max_streams'], streams)
+        config.web['pool_workers'] = max(config.web['pool_workers'], config.web['pool_max_streams'] + 16)
+    web_server.engine = settings['engine']
+    web_server.host = settings['host']
+    web_server.port = 0
+    if not web_server.start_server():
+        raise RuntimeError("Web server did not start")
+    return web_server
+
+def run_load_test(settings):
+    """Start the server in this process, drive it from client processes and return the report"""
+    web_server = start_test_server(settings)
+
+    context = multiprocessing.get_context('spawn')
+    result_queue = context.Queue()
+    tablet_ids = list(range(settings['tablets']))
+    processes = [
+        context.Process(target=run_clients, args=(
+            settings['host'], web_server.port, tablet_ids[i::settings['client_processes']], settings, result_queue))
+        for i in range(settings['client_processes'])
+    ]
+
+    try:
+        # Server CPU: clients run in their own processes, this process only serves
+        cpu_before = os.times()
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+
+        client_results = [result_queue.get(timeout=settings['duration'] + settings['ramp_up'] + 60)
+                          for _ in processes]
+        wall_time = time.perf_counter() - started
+        cpu_after = os.times()
+
+        for process in processes:
+            process.join(timeout=5)
+
+        server_info = web_server.get_server_info()
+    finally:
+        web_server.stop_server()
+
+    cpu_seconds = (cpu_after.user - cpu_before.user) + (cpu_after.system - cpu_before.system)
+    report = {
+        'settings': settings,
+        'server': {
+            'engine': settings['engine'],
+            'response_cache': settings['response_cache'],
+            'cpu_seconds': round(cpu_seconds, 3),
+            'cpu_percent': round(100 * cpu_seconds / wall_time, 1),
+            'response_cache_stats': server_info['response_cache'],
+            'worker_pool': server_info.get('worker_pool'),
+            'connections': server_info.get('connections')
+        },
+        'wall_time_s': round(wall_time, 3)
+    }
+    report.update(summarize(client_results, wall_time))
+    return report
+
+def follow_broadcast(host, port, subscribers, ready, done, result_queue):
+    """Broadcast benchmark client: hold many event streams on one selector and time every event"""
+    selector = selectors.DefaultSelector()
+    # HTTP/1.0: close-delimited body, events arrive without chunk framing
+    request = f"GET /api/events HTTP/1.0\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n".encode('latin-1')
+    for _ in range(subscribers):
+        sock = socket.create_connection((host, port), timeout=5)
+        sock.sendall(request)
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ, {'buffer': b'', 'subscribed': False})
+
+    arrivals = {}
+    subscribed = 0
+    refused = 0
+    open_streams = subscribers
+    drain_deadline = None
+    while open_streams and (drain_deadline is None or time.monotonic() < drain_deadline):
+        if drain_deadline is None and done.is_set():
+            # Publisher finished, give late deliveries a moment
+            drain_deadline = time.monotonic() + 2.0
+        for key, _ in selector.select(timeout=0.1):
+            received = time.monotonic()
+            try:
+                data = key.fileobj.recv(65536)
+            except OSError:
+                data = b''
+            if not data:
+                selector.unregister(key.fileobj)
+                key.fileobj.close()
+                open_streams -= 1
+                if not key.data['subscribed']:
+                    # Closed before the retry line, e.g. 503 once the stream limit is reached
+                    refused += 1
+                    if subscribed + refused == subscribers:
+                        ready.set()
+                continue
+
+            state = key.data
+            blocks = (state['buffer'] + data).split(b'\n\n')
+            state['buffer'] = blocks.pop()
+            for block in blocks:
+                if not state['subscribed'] and b'retry:' in block:
+                    # The retry line is sent after the server registered the subscriber
+                    state['subscribed'] = True
+                    subscribed += 1
+                    if subscribed + refused == subscribers:
+                        ready.set()
+                elif block.startswith(b'event: slide_change'):
+                    version = json.loads(block.split(b'data: ', 1)[1])['version']
+                    arrivals.setdefault(version, []).append(received)
+
+    for key in list(selector.get_map().values()):
+        key.fileobj.close()
+    ready.set()
+    result_queue.put({'subscribed': subscribed, 'refused': refused, 'arrivals': arrivals})
+
+def run_broadcast_benchmark(settings):
+    """Publish slide changes to many event-stream subscribers and measure the delivery time"""
+    web_server = start_test_server(settings, streams=settings['broadcast_subscribers'])
+    room = web_server.default_room
+    slide_count = max(1, room.content.get_slide_count())
+
+    context = multiprocessing.get_context('spawn')
+    result_queue = context.Queue()
+    ready = context.Event()
+    done = context.Event()
+    process = context.Process(target=follow_broadcast, args=(
+        settings['host'], web_server.port, settings['broadcast_subscribers'], ready, done, result_queue))
+
+    publish_times = {}
+    publish_durations = []
+    try:
+        process.start()
+        if not ready.wait(timeout=60):
+            raise RuntimeError("Event streams did not connect")
+
+        cpu_before = os.times()
+        for index in range(settings['broadcast_events']):
+            # CLOCK_MONOTONIC is system-wide, arrival times of the client process compare directly
+            started = time.monotonic()
+            room.set_current_slide(1 + index % slide_count)
+            publish_durations.append(time.monotonic() - started)
+            publish_times[room.state_version] = started
+            time.sleep(settings['broadcast_interval'])
+        cpu_after = os.times()
+
+        done.set()
+        result = result_queue.get(timeout=60)
+        process.join(timeout=5)
+        broadcast_stats = web_server.get_broadcast_stats()
+        connections = web_server.get_server_info().get('connections')
+    finally:
+        done.set()
+        web_server.stop_server()
+
+    delivery = []
+    fanout = []
+    for version, published in publish_times.items():
+        arrived = sorted(result['arrivals'].get(version, []))
+        delivery.extend(arrival - published for arrival in arrived)
+        if arrived:
+            fanout.append(arrived[-1] - published)
+    delivery.sort()
+    fanout.sort()
+    publish_durations.sort()
+
+    expected = result['subscribed'] * len(publish_times)
+    cpu_seconds = (cpu_after.user - cpu_before.user) + (cpu_after.system - cpu_before.system)
+    return {
+        'settings': settings,
+        'broadcast': {
+            'engine': settings['engine'],
+            'subscribers': result['subscribed'],
+            'refused': result['refused'],
+            'events': len(publish_times),
+            'deliveries': len(delivery),
+            'missing': expected - len(delivery),
+            'evictions': broadcast_stats['evictions'],
+            'server_cpu_seconds': round(cpu_seconds, 3),
+            'publish_ms': _latency_summary(publish_durations),
+            'delivery_ms': _latency_summary(delivery),
+            'fanout_ms': _latency_summary(fanout),
+            'connections': connections
+        }
+    }
+
+def _latency_summary(sorted_seconds):
+    return {
+        'p50': _ms(percentile(sorted_seconds, 0.50)),
+        'p95': _ms(percentile(sorted_seconds, 0.95)),
+        'p99': _ms(percentile(sorted_seconds, 0.99)),
+        'max': _ms(sorted_seconds[-1] if sorted_seconds else None)
+    }
+
+def print_report(report):
+    """Short human-readable summary of a report"""
+    if 'broadcast' in report:
+        broadcast = report['broadcast']
+        print(f"engine={broadcast['engine']} subscribers={broadcast['subscribers']} refused={broadcast['refused']} "
+              f"events={broadcast['events']} missing={broadcast['missing']} evictions={broadcast['evictions']}")
+        print(f"{'ms':32} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+        for name in ('publish_ms', 'delivery_ms', 'fanout_ms'):
+            summary = broadcast[name]
+            print(f"{name:32} {_fmt(summary['p50'])} {_fmt(summary['p95'])} {_fmt(summary['p99'])} {_fmt(summary['max'])}")
+        return
+
+    totals = report['totals']
+    server = report['server']
+    print(f"engine={server['engine']} response_cache={server['response_cache']} "
+          f"requests={totals['requests']} rps={totals['throughput_rps']} "
+          f"errors={totals['errors']} ({totals['error_rate']:.2%}) server_cpu={server['cpu_percent']}%")
+    print(f"{'route':32} {'req':>7} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for route, stats in report['routes'].items():
+        latency = stats['latency_ms']
+        print(f"{route:32} {stats['requests']:>7} {stats['errors']:>5} "
+              f"{_fmt(latency['p50'])} {_fmt(latency['p95'])} {_fmt(latency['p99'])}")
+
+def _fmt(value):
+    return f"{value:>9.2f}" if value is not None else f"{'-':>9}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Lasttest für den Remote-Präsentations-Webserver')
+    parser.add_argument('--tablets', type=int, default=20, help='Simulierte Tablets (Standard: 20)')
+    parser.add_argument('--duration', type=float, default=30, help='Laufzeit in Sekunden (Standard: 30)')
+    parser.add_argument('--engine', choices=['threaded', 'pool', 'asyncio'], default='threaded',
+                        help='Web-Server Engine (Standard: threaded)')
+    parser.add_argument('--no-response-cache', action='store_true', help='JSON-Antworten bei jeder Anfrage neu serialisieren')
+    parser.add_argument('--poll-interval', type=float, default=3.0, help='Sekunden zwischen Polls pro Tablet (Standard: 3)')
+    parser.add_argument('--swipe-interval', type=float, default=5.0, help='Mittlere Sekunden zwischen Wischgesten, 0 = aus')
+    parser.add_argument('--storm-interval', type=float, default=10.0, help='Sekunden zwischen Reconnect-Stürmen, 0 = aus')
+    parser.add_argument('--event-streams', type=float, default=0.0, help='Anteil der Tablets mit SSE-Verbindung (0-1)')
+    parser.add_argument('--render', action='store_true', help='Zusätzlich gerenderte Slide-PNGs abrufen')
+    parser.add_argument('--ramp-up', type=float, default=2.0, help='Sekunden, über die sich die Tablets verbinden')
+    parser.add_argument('--client-processes', type=int, default=2, help='Prozesse für die Tablets (Standard: 2)')
+    parser.add_argument('--timeout', type=float, default=10.0, help='Socket-Timeout pro Anfrage in Sekunden')
+    parser.add_argument('--broadcast-subscribers', type=int, default=0,
+                        help='Broadcast-Benchmark mit so vielen SSE-Verbindungen statt Tablet-Lasttest')
+    parser.add_argument('--broadcast-events', type=int, default=50, help='Folienwechsel im Broadcast-Benchmark')
+    parser.add_argument('--broadcast-interval', type=float, default=0.1, help='Sekunden zwischen Folienwechseln')
+    parser.add_argument('--host', default='127.0.0.1', help='Bind-Adresse des Servers')
+    parser.add_argument('--seed', type=int, default=1, help='Zufalls-Seed für reproduzierbare Läufe')
+    parser.add_argument('--output', help='JSON-Ergebnisdatei (Standard: stdout)')
+    args = parser.parse_args(argv)
+
+    settings = {
+        'tablets': args.tablets,
+        'duration': args.duration,
+        'engine': args.engine,
+        'response_cache': not args.no_response_cache,
+        'poll_interval': args.poll_interval,
+        'swipe_interval': args.swipe_interval,
+        'storm_interval': args.storm_interval,
+        'event_streams': args.event_streams,
+        'render': args.render,
+        'ramp_up': args.ramp_up,
+        'client_processes': max(1, min(args.client_processes, args.tablets)),
+        'timeout': args.timeout,
+        'host': args.host,
+        'seed': args.seed,
+        'broadcast_subscribers': args.broadcast_subscribers,
+        'broadcast_events': args.broadcast_events,
+        'broadcast_interval': args.broadcast_interval
+    }
+
+    report = run_broadcast_benchmark(settings) if args.broadcast_subscribers else run_load_test(settings)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print_report(report)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+if __name__ == '__main__':
+    main()
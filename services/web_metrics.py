@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Metriken für den Remote-Präsentations-Webserver
+Anfragezähler, Latenz-Histogramme und Byte-Zähler im Prometheus-Textformat
+"""
+
+import threading
+from bisect import bisect_left
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Latency buckets in seconds, the last bucket is +Inf
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Fixed route labels keep the label cardinality bounded
+ROUTES = {
+    '/', '/api/current_slide', '/api/slide', '/api/slides_list', '/api/bundle', '/api/changes',
+    '/api/events', '/api/control', '/api/metrics', '/api/time', '/ws', '/sw.js'
+}
+
+# Held open by design, their duration says nothing about server latency
+LONG_LIVED_ROUTES = {'/api/events', '/ws', '/api/current_slide?since'}
+
+def route_label(target):
+    """Map a request target to its route label"""
+    path, _, query = target.partition('?')
+    if path.startswith('/r/'):
+        # Rooms share one set of route labels
+        path = '/' + path[3:].partition('/')[2]
+    if path == '/api/current_slide' and 'since=' in query:
+        return '/api/current_slide?since'
+    if path in ROUTES:
+        return path
+    if path.startswith('/static/'):
+        # Fingerprinted names change with every build
+        return '/static/{asset}'
+    if path.startswith('/api/image/'):
+        return '/api/image/{name}'
+    if path.startswith('/api/slide/') and path.endswith('/render.png'):
+        return '/api/slide/{id}/render.png'
+    return 'other'
+
+def _escape(value):
+    """Escape a Prometheus label value"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class RouteStats:
+    """Latency histogram and byte counter of one route"""
+    __slots__ = ('buckets', 'duration_sum', 'duration_count', 'response_bytes')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.duration_sum = 0.0
+        self.duration_count = 0
+        self.response_bytes = 0
+
+class WebMetrics:
+    """Sammelt Webserver-Metriken mit einer kurzen Sperre pro Anfrage"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.request_counts = {}
+        self.routes = {}
+        self.open_connections = 0
+
+    def observe_request(self, method, target, status, duration, response_bytes):
+        """Record one finished request, duration None for long-lived routes"""
+        route = route_label(target)
+        # Bucket lookup outside the lock, the critical section is a few increments
+        bucket = bisect_left(LATENCY_BUCKETS, duration) if duration is not None else None
+        key = (method, route, status)
+
+        with self.lock:
+            self.request_counts[key] = self.request_counts.get(key, 0) + 1
+
+            stats = self.routes.get(route)
+            if stats is None:
+                stats = self.routes[route] = RouteStats()
+            stats.response_bytes += response_bytes
+            if bucket is not None and route not in LONG_LIVED_ROUTES:
+                stats.buckets[bucket] += 1
+                stats.duration_sum += duration
+                stats.duration_count += 1
+
+    def connection_opened(self):
+        with self.lock:
+            self.open_connections += 1
+
+    def connection_closed(self):
+        with self.lock:
+            self.open_connections -= 1
+
+    def render(self, samples=()):
+        """Prometheus text exposition, samples are extra (name, type, help, value) metrics"""
+        with self.lock:
+            request_counts = dict(self.request_counts)
+            routes = {route: (list(stats.buckets), stats.duration_sum, stats.duration_count, stats.response_bytes)
+                      for route, stats in self.routes.items()}
+            open_connections = self.open_connections
+
+        lines = [
+            '# HELP web_requests_total HTTP requests by method, route and status.',
+            '# TYPE web_requests_total counter'
+        ]
+        for (method, route, status), count in sorted(request_counts.items()):
+            lines.append(f'web_requests_total{{method="{_escape(method)}",route="{_escape(route)}",'
+                         f'status="{status}"}} {count}')
+
+        lines += [
+            '# HELP web_request_duration_seconds Time from parsed request line to finished response.',
+            '# TYPE web_request_duration_seconds histogram'
+        ]
+        for route, (buckets, duration_sum, duration_count, _) in sorted(routes.items()):
+            if route in LONG_LIVED_ROUTES:
+                continue
+            label = _escape(route)
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, buckets):
+                cumulative += count
+                lines.append(f'web_request_duration_seconds_bucket{{route="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'web_request_duration_seconds_bucket{{route="{label}",le="+Inf"}} {duration_count}')
+            lines.append(f'web_request_duration_seconds_sum{{route="{label}"}} {duration_sum:.6f}')
+            lines.append(f'web_request_duration_seconds_count{{route="{label}"}} {duration_count}')
+
+        lines += [
+            '# HELP web_response_bytes_total Response body bytes by route (Content-Length framed responses).',
+            '# TYPE web_response_bytes_total counter'
+        ]
+        for route, (_, _, _, response_bytes) in sorted(routes.items()):
+            lines.append(f'web_response_bytes_total{{route="{_escape(route)}"}} {response_bytes}')
+
+        lines += [
+            '# HELP web_handler_connections Connections currently held by request handler threads.',
+            '# TYPE web_handler_connections gauge',
+            f'web_handler_connections {open_connections}'
+        ]
+        for name, metric_type, help_text, value in samples:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}', f'{name} {value}']
+
+        return '\n'.join(lines) + '\n'
+
+# Globale Instanz
+web_metrics = WebMetrics()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Rate-Limit für Steuerbefehle des Remote-Präsentations-Webservers
+Ein Token-Bucket pro Client-IP, damit Dauerklicken das Hauptdisplay nicht ausbremst
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+class TokenBucket:
+    """Tokens of one client, refilled lazily on access"""
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, tokens, updated):
+        self.tokens = tokens
+        self.updated = updated
+
+class ClientRateLimiter:
+    """Token-Bucket pro Client: rate Befehle pro Sekunde, Stöße bis burst"""
+
+    def __init__(self, rate, burst, max_clients=4096):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_clients = max_clients
+        # LRU order, idle clients fall out first once max_clients is reached
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+
+    @property
+    def enabled(self):
+        return self.rate > 0
+
+    def acquire(self, client):
+        """Take one token, returns 0 if allowed, else the seconds until the next token"""
+        if not self.enabled:
+            return 0
+
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(client)
+            if bucket is None:
+                # A client dropped from the LRU was idle, its bucket would be full anyway
+                bucket = self.buckets[client] = TokenBucket(self.burst, now)
+                if len(self.buckets) > self.max_clients:
+                    self.buckets.popitem(last=False)
+            else:
+                self.buckets.move_to_end(client)
+                bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+                bucket.updated = now
+
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                self.allowed += 1
+                return 0
+
+            self.limited += 1
+            return (1 - bucket.tokens) / self.rate
+
+    def get_stats(self):
+        """Settings, tracked clients and decision counters"""
+        return {
+            'rate': self.rate,
+            'burst': self.burst,
+            'clients': len(self.buckets),
+            'allowed': self.allowed,
+            'limited': self.limited
+        }
@@ -8,52 +8,521 @@ import threading
 import time
 import json
 import os
-import base64
-from datetime import datetime
+import queue
+import gzip
+import hashlib
+import html
+import math
+import mimetypes
+import re
+import selectors
+import socket
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from socketserver import ThreadingMixIn
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlparse, parse_qs, unquote, quote
 from PIL import Image
-from io import BytesIO
 
 from core.logger import logger
-from models.content import content_manager
+from core.config import config
+from models.content import content_manager, ContentManager
+from services.websocket import WebSocketConnection, WebSocketError, compute_accept_key
+from services.image_variants import image_variants, VARIANT_FORMATS
+from services.slide_rasterizer import SlideRasterizer
+from services.web_metrics import web_metrics, PROMETHEUS_CONTENT_TYPE
+from services.web_broadcast import Broadcaster
+from services.web_rate_limit import ClientRateLimiter
+
+JSON_CONTENT_TYPE = 'application/json; charset=utf-8'
+HTML_CONTENT_TYPE = 'text/html; charset=utf-8'
+SLIDE_NOT_FOUND_BODY = json.dumps({'error': 'Slide not found'}).encode('utf-8')
+RATE_LIMITED_BODY = json.dumps({'status': 'error', 'error': 'rate_limited'}).encode('utf-8')
+IMAGE_DIR = os.path.join("data", "images")
+
+# CSS/JavaScript of the tablet interface, served under content-hash names
+STATIC_DIR = os.path.join(os.path.dirname(__file__), 'web_static')
+STATIC_CONTENT_TYPES = {'.css': 'text/css; charset=utf-8', '.js': 'application/javascript; charset=utf-8'}
+UNVERSIONED_ASSETS = ('style.css', 'script.js')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Filled in one pass, slide text containing a placeholder name stays as it is
+PAGE_PLACEHOLDER_PATTERN = re.compile(r'__(STYLE_URL|SCRIPT_URL|SLIDE_HTML|SLIDE_INFO|INITIAL_STATE)__')
+
+# Room of the unprefixed routes, further rooms live under /r/<room>/
+DEFAULT_ROOM = 'default'
+ROOM_NAME_PATTERN = re.compile(r'^[a-z0-9][a-z0-9_-]{0,31}$')
+
+def read_static_file(name):
+    """Read an asset file from services/web_static"""
+    with open(os.path.join(STATIC_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+def server_time_ms():
+    """Server wall clock in milliseconds, the time base of /api/time and switch_at"""
+    return time.time() * 1000
+
+def make_etag(body):
+    """Strong ETag derived from the response bytes"""
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+class CachedResponse:
+    """Ready-to-send response bytes together with their ETag and gzip variant"""
+    __slots__ = ('body', 'etag', 'content_type', 'gzip_body', 'gzip_etag', 'headers')
+    
+    def __init__(self, body, content_type=JSON_CONTENT_TYPE, headers=None):
+        self.body = body
+        self.etag = make_etag(body)
+        self.content_type = content_type
+        # Fixed headers of this representation, e.g. preload hints
+        self.headers = headers or {}
+        self.gzip_body = None
+        # Each encoding is its own representation and needs its own strong ETag
+        self.gzip_etag = self.etag[:-1] + '-gz"'
+    
+    def compress(self, level=6):
+        """Return the gzip variant, compressing it on first use"""
+        if self.gzip_body is None:
+            # mtime=0 keeps the compressed bytes reproducible
+            self.gzip_body = gzip.compress(self.body, compresslevel=level, mtime=0)
+        return self.gzip_body
+
+class RangeNotSatisfiable(Exception):
+    """Requested byte range lies outside the file"""
+
+def parse_byte_range(header, size):
+    """Parse a single-range Range header into inclusive (start, end), None to send the full file"""
+    unit, _, spec = header.partition('=')
+    # Multiple ranges would need multipart/byteranges, the full file is a valid answer
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    
+    first, sep, last = spec.strip().partition('-')
+    first, last = first.strip(), last.strip()
+    if not sep or not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+        return None
+    
+    if first:
+        start = int(first)
+        end = int(last) if last else size - 1
+        if last and end < start:
+            return None
+    else:
+        # Suffix range: the last N bytes
+        suffix = int(last)
+        if suffix == 0:
+            raise RangeNotSatisfiable(header)
+        start = max(size - suffix, 0)
+        end = size - 1
+    
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    return start, min(end, size - 1)
+
+def detect_content_type(path):
+    """Detect the image type from the file header, the extension is only a fallback"""
+    try:
+        with Image.open(path) as img:
+            content_type = Image.MIME.get(img.format)
+    except Exception:
+        content_type = None
+    return content_type or mimetypes.guess_type(path)[0] or 'application/octet-stream'
 
 class ThreadedHTTPServer(ThreadingMixIn, HTTPServer):
     """Multi-threaded HTTP Server"""
     daemon_threads = True
     allow_reuse_address = True
+    # Reconnect storms after WLAN drops, the default backlog of 5 loses SYNs (1 s retransmit)
+    request_queue_size = 128
+
+class PooledConnection:
+    """Keep-alive connection of the worker pool, a worker serves it one request at a time"""
+    __slots__ = ('request', 'client_address', 'handler', 'idle_since')
+    
+    def __init__(self, request, client_address):
+        self.request = request
+        self.client_address = client_address
+        self.handler = None
+        self.idle_since = None
+
+class WorkerPoolHTTPServer(HTTPServer):
+    """HTTP Server mit fester Worker-Anzahl und begrenzter Accept-Queue"""
+    allow_reuse_address = True
+    request_queue_size = 128
+    
+    def __init__(self, server_address, handler_class, workers=32, queue_size=64, max_streams=16):
+        super().__init__(server_address, handler_class)
+        self.connection_queue = queue.Queue(maxsize=queue_size)
+        # Streams and long-polls never get the last worker, short requests must keep flowing
+        self.max_streams = min(max_streams, workers - 1)
+        self.stats_lock = threading.Lock()
+        self.busy_workers = 0
+        self.active_streams = 0
+        self.active_long_polls = 0
+        self.rejected_connections = 0
+        self.rejected_streams = 0
+        self.rejected_long_polls = 0
+        
+        # Idle keep-alive connections wait on a selector, not in a worker
+        self.idle_selector = selectors.DefaultSelector()
+        self.idle_handoff = queue.SimpleQueue()
+        self.idle_count = 0
+        self.idle_closing = False
+        self.wake_reader, self.wake_writer = socket.socketpair()
+        # Drained after the loop too, an empty socketpair must not block the shutdown
+        self.wake_reader.setblocking(False)
+        self.idle_selector.register(self.wake_reader, selectors.EVENT_READ)
+        self.idle_thread = threading.Thread(target=self._idle_loop, name="web-idle", daemon=True)
+        self.idle_thread.start()
+        
+        self.workers = []
+        for index in range(workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"web-worker-{index}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+    
+    def process_request(self, request, client_address):
+        """Hand the connection to a worker, reject with 503 when the queue is full"""
+        self._enqueue(PooledConnection(request, client_address))
+    
+    def _enqueue(self, connection):
+        """Queue a connection with a pending request, 503 and close when the queue is full"""
+        try:
+            self.connection_queue.put_nowait(connection)
+        except queue.Full:
+            with self.stats_lock:
+                self.rejected_connections += 1
+            self._reject_connection(connection.request)
+            self._close_connection(connection)
+    
+    def _reject_connection(self, request):
+        """Answer 503 without parsing the request"""
+        body = "Server overloaded"
+        response = (
+            "HTTP/1.1 503 Service Unavailable\r\n"
+            f"Retry-After: {config.web['retry_after']}\r\n"
+            "Content-Type: text/plain\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+            f"{body}"
+        )
+        try:
+            # Drain what already arrived, unread data would turn the close into a reset
+            request.setblocking(False)
+            try:
+                request.recv(65536)
+            except OSError:
+                pass
+            request.setblocking(True)
+            request.sendall(response.encode('ascii'))
+        except OSError:
+            pass
+    
+    def _worker_loop(self):
+        """Serve one request per queued connection, park it again while it stays open"""
+        while True:
+            connection = self.connection_queue.get()
+            if connection is None:
+                break
+            
+            with self.stats_lock:
+                self.busy_workers += 1
+            try:
+                if self._serve_requests(connection):
+                    self._park(connection)
+                else:
+                    self._close_connection(connection)
+            finally:
+                with self.stats_lock:
+                    self.busy_workers -= 1
+    
+    def _serve_requests(self, connection):
+        """Serve the pending request(s) of a connection, True if it stays open"""
+        try:
+            handler = connection.handler
+            if handler is None:
+                handler = connection.handler = self._open_handler(connection)
+            
+            while True:
+                handler.handle_one_request()
+                if handler.close_connection:
+                    return False
+                # Pipelined requests may already sit in the read buffer, the selector would not see them
+                if not self._has_pending_data(handler):
+                    return True
+        except Exception:
+            self.handle_error(connection.request, connection.client_address)
+            return False
+    
+    def _open_handler(self, connection):
+        """Set up a request handler for a connection without running its request loop"""
+        handler_class = self.RequestHandlerClass
+        handler = handler_class.__new__(handler_class)
+        handler.request = connection.request
+        handler.client_address = connection.client_address
+        handler.server = self
+        handler.setup()
+        handler.close_connection = True
+        return handler
+    
+    @staticmethod
+    def _has_pending_data(handler):
+        """Check without blocking whether the next request already arrived"""
+        handler.request.settimeout(0)
+        try:
+            return bool(handler.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            handler.request.settimeout(handler.timeout)
+    
+    def _park(self, connection):
+        """Give an idle keep-alive connection to the idle selector"""
+        connection.idle_since = time.monotonic()
+        self.idle_handoff.put(connection)
+        try:
+            self.wake_writer.send(b'\0')
+        except OSError:
+            # Server closing, the idle loop drops what is left in the handoff
+            pass
+    
+    def _close_connection(self, connection):
+        """Flush and close a connection"""
+        try:
+            if connection.handler is not None:
+                connection.handler.finish()
+        except OSError:
+            pass
+        finally:
+            self.shutdown_request(connection.request)
+    
+    def _idle_loop(self):
+        """Wait for the next request on idle connections and queue them for the workers"""
+        selector = self.idle_selector
+        while not self.idle_closing:
+            for key, _ in selector.select(timeout=1.0):
+                if key.fileobj is self.wake_reader:
+                    self._accept_parked()
+                else:
+                    # Readable: next request, or the tablet closed it
+                    selector.unregister(key.fileobj)
+                    self.idle_count -= 1
+                    self._enqueue(key.data)
+            
+            # Same idle limit as a connection held by a worker
+            deadline = time.monotonic() - config.web['keepalive_timeout']
+            expired = [key for key in selector.get_map().values()
+                       if key.data is not None and key.data.idle_since < deadline]
+            for key in expired:
+                selector.unregister(key.fileobj)
+                self.idle_count -= 1
+                self._close_connection(key.data)
+        
+        self._accept_parked()
+        for key in list(selector.get_map().values()):
+            if key.data is not None:
+                self._close_connection(key.data)
+        self.idle_count = 0
+        selector.close()
+        self.wake_reader.close()
+    
+    def _accept_parked(self):
+        """Register connections parked by the workers"""
+        try:
+            self.wake_reader.recv(4096)
+        except OSError:
+            # BlockingIOError: nothing to drain
+            pass
+        while True:
+            try:
+                connection = self.idle_handoff.get_nowait()
+            except queue.Empty:
+                break
+            if self.idle_closing:
+                self._close_connection(connection)
+                continue
+            self.idle_selector.register(connection.request, selectors.EVENT_READ, connection)
+            self.idle_count += 1
+    
+    def acquire_stream_slot(self, kind='stream'):
+        """Reserve a worker for a stream or long-poll, False if the cap is reached"""
+        with self.stats_lock:
+            if self.active_streams + self.active_long_polls >= self.max_streams:
+                if kind == 'long_poll':
+                    self.rejected_long_polls += 1
+                else:
+                    self.rejected_streams += 1
+                return False
+            if kind == 'long_poll':
+                self.active_long_polls += 1
+            else:
+                self.active_streams += 1
+            return True
+    
+    def release_stream_slot(self, kind='stream'):
+        """Return a worker reserved by acquire_stream_slot"""
+        with self.stats_lock:
+            if kind == 'long_poll':
+                self.active_long_polls -= 1
+            else:
+                self.active_streams -= 1
+    
+    def handle_error(self, request, client_address):
+        """Log handler errors instead of printing tracebacks to stderr"""
+        logger.error(f"Error processing connection from {client_address[0]}")
+    
+    def server_close(self):
+        """Stop the workers and idle loop, drop connections still waiting"""
+        super().server_close()
+        
+        self.idle_closing = True
+        self.wake_writer.send(b'\0')
+        self.idle_thread.join(timeout=5)
+        self.wake_writer.close()
+        
+        while True:
+            try:
+                connection = self.connection_queue.get_nowait()
+            except queue.Empty:
+                break
+            if connection is not None:
+                self._close_connection(connection)
+        
+        for _ in self.workers:
+            self.connection_queue.put(None)
+    
+    def get_pool_stats(self):
+        """Current load of the worker pool"""
+        with self.stats_lock:
+            return {
+                'workers': len(self.workers),
+                'busy_workers': self.busy_workers,
+                'queue_depth': self.connection_queue.qsize(),
+                'queue_capacity': self.connection_queue.maxsize,
+                'idle_connections': self.idle_count,
+                'rejected_connections': self.rejected_connections,
+                'active_streams': self.active_streams,
+                'active_long_polls': self.active_long_polls,
+                'max_streams': self.max_streams,
+                'rejected_streams': self.rejected_streams,
+                'rejected_long_polls': self.rejected_long_polls
+            }
 
 class PresentationRequestHandler(BaseHTTPRequestHandler):
     """HTTP Request Handler für Präsentations-Streaming"""
     
+    # Persistent connections, every response must be framed by length or chunks
+    protocol_version = 'HTTP/1.1'
+    
+    # Headers and body are separate writes, with Nagle the body waits for a delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+    
+    # HEAD requests run the GET routes but never write a body
+    head_only = False
+    
+    # Room of the current request, resolved from the /r/<room>/ prefix
+    room = None
+    
+    # Metrics of the current request, filled by parse_request, send_response and send_header
+    request_started = None
+    response_status = None
+    response_bytes = 0
+    
+    def setup(self):
+        """Apply the keep-alive idle timeout before the socket files are created"""
+        self.timeout = config.web['keepalive_timeout']
+        self.requests_handled = 0
+        super().setup()
+        web_metrics.connection_opened()
+    
+    def finish(self):
+        """Flush the socket files and leave the connection gauge"""
+        try:
+            super().finish()
+        finally:
+            web_metrics.connection_closed()
+    
+    def handle_one_request(self):
+        """Count requests per connection for the keep-alive cap and record metrics"""
+        self.requests_handled += 1
+        self.head_only = False
+        self.request_started = None
+        self.response_status = None
+        self.response_bytes = 0
+        super().handle_one_request()
+        
+        # Idle keep-alive timeouts and unparsable request lines have no route
+        if self.request_started is not None and self.response_status is not None:
+            web_metrics.observe_request(
+                self.command, self.path, self.response_status,
+                time.perf_counter() - self.request_started, self.response_bytes)
+    
+    def parse_request(self):
+        """Start the latency clock once the request line arrived, not while idling"""
+        self.request_started = time.perf_counter()
+        return super().parse_request()
+    
+    def request_received_time(self):
+        """Server time in ms at which the request line arrived"""
+        return server_time_ms() - (time.perf_counter() - self.request_started) * 1000
+    
+    def send_response(self, code, message=None):
+        """Send the status line and close the connection once the request cap is hit"""
+        self.response_status = code
+        super().send_response(code, message)
+        if code != 101 and self.requests_handled >= config.web['keepalive_max_requests']:
+            self.send_header('Connection', 'close')
+    
+    def send_header(self, keyword, value):
+        """Send a header, remembering the body size for the byte counters"""
+        if keyword == 'Content-Length' and not self.head_only:
+            self.response_bytes = int(value)
+        super().send_header(keyword, value)
+    
     def do_GET(self):
         """Handle GET requests"""
         try:
             parsed_path = urlparse(self.path)
-            path = parsed_path.path
+            self.room, path = web_server.split_room_path(parsed_path.path)
             query_params = parse_qs(parsed_path.query)
             
-            if path == '/':
+            if self.room is None:
+                self.send_404()
+            elif path == '/':
                 self.serve_presentation_page()
             elif path == '/api/current_slide':
-                self.serve_current_slide_data()
+                self.serve_current_slide(query_params)
             elif path == '/api/slide':
                 slide_id = int(query_params.get('id', [1])[0])
                 self.serve_slide_data(slide_id)
             elif path == '/api/slides_list':
                 self.serve_slides_list()
-            elif path == '/static/style.css':
-                self.serve_css()
-            elif path == '/static/script.js':
-                self.serve_javascript()
+            elif path == '/api/bundle':
+                self.serve_bundle()
+            elif path == '/api/changes':
+                self.serve_changes(query_params)
+            elif path.startswith('/api/slide/') and path.endswith('/render.png'):
+                # Pre-rendered slide bitmap for weak tablets
+                self.serve_slide_render(path[len('/api/slide/'):-len('/render.png')], query_params)
+            elif path == '/api/events':
+                self.serve_event_stream()
+            elif path == '/ws':
+                self.handle_websocket()
+            elif path.startswith('/static/'):
+                self.serve_static_asset(path[len('/static/'):])
+            elif path == '/sw.js':
+                self.serve_service_worker()
             elif path.startswith('/api/image/'):
                 # Serve slide images
                 image_path = path.replace('/api/image/', '')
-                self.serve_image(image_path)
+                self.serve_image(image_path, query_params)
             elif path == '/api/control':
                 # For receiving control commands from tablet
-                self.handle_control_command(query_params)
+                if self.check_control_rate():
+                    self.handle_control_command(query_params)
+            elif path == '/api/metrics':
+                self.serve_metrics()
+            elif path == '/api/time':
+                self.serve_time()
             else:
                 self.send_404()
                 
@@ -61,65 +530,196 @@ class PresentationRequestHandler(BaseHTTPRequestHandler):
             logger.error(f"Error handling GET request: {e}")
             self.send_500()
     
+    def do_HEAD(self):
+        """Handle HEAD requests, same headers as GET without the body"""
+        self.head_only = True
+        path = web_server.split_room_path(urlparse(self.path).path)[1]
+        
+        # Streams have no meaningful head, answering would block the connection
+        if path in ('/api/events', '/ws'):
+            self.send_body(405, b'', 'text/plain', {'Allow': 'GET'})
+        else:
+            self.do_GET()
+    
     def do_POST(self):
         """Handle POST requests for slide control"""
         try:
-            if self.path == '/api/control':
-                content_length = int(self.headers.get('Content-Length', 0))
-                post_data = self.rfile.read(content_length).decode('utf-8')
-                command_data = json.loads(post_data)
-                self.handle_control_command_post(command_data)
+            # Always consume the body, leftovers would corrupt the next keep-alive request
+            content_length = int(self.headers.get('Content-Length', 0))
+            post_data = self.rfile.read(content_length).decode('utf-8')
+            
+            self.room, path = web_server.split_room_path(urlparse(self.path).path)
+            if self.room is not None and path == '/api/control':
+                if self.check_control_rate():
+                    command_data = json.loads(post_data)
+                    self.handle_control_command_post(command_data)
             else:
                 self.send_404()
         except Exception as e:
             logger.error(f"Error handling POST request: {e}")
             self.send_500()
     
+    @staticmethod
+    def parse_long_poll(query_params):
+        """Return (since, timeout) for a long-poll request, None for a plain request, ValueError if invalid"""
+        if 'since' not in query_params:
+            return None
+        
+        timeout = config.web['long_poll_timeout']
+        if 'timeout' in query_params:
+            requested = float(query_params['timeout'][0])
+            if not math.isfinite(requested):
+                raise ValueError(f"Invalid timeout {requested}")
+            timeout = max(0.0, min(requested, timeout))
+        return int(query_params['since'][0]), timeout
+    
+    def serve_current_slide(self, query_params):
+        """Serve the current slide, as long-poll if since is given"""
+        try:
+            long_poll = self.parse_long_poll(query_params)
+        except ValueError:
+            self.send_body(400, 'since must be an integer, timeout a number', 'text/plain; charset=utf-8')
+            return
+        
+        # HEAD only asks for the headers, holding it would just block the connection
+        if long_poll and not self.head_only:
+            # A held long-poll occupies a pool worker like a stream
+            if not self.acquire_stream_slot('long_poll'):
+                return
+            try:
+                self.wait_for_long_poll(*long_poll)
+            finally:
+                self.release_stream_slot('long_poll')
+        self.serve_current_slide_data()
+    
+    def wait_for_long_poll(self, since, timeout):
+        """Long-poll: hold the request until the state moves on"""
+        self.room.wait_for_state_change(since, timeout)
+    
     def serve_presentation_page(self):
-        """Serve the main presentation HTML page"""
-        html_content = self.get_presentation_html()
+        """Serve the presentation page with the current slide already rendered"""
+        cached = self.room.get_page_response(self.room.current_slide_id)
+        # Empty presentation: the plain shell, the script shows the error
+        self.send_cached(cached or web_server.get_static_asset('index.html'), {'Cache-Control': 'no-cache'})
+    
+    def accepts_gzip(self):
+        """Check whether the client accepts gzip content encoding"""
+        accept_encoding = self.headers.get('Accept-Encoding', '')
+        wildcard = False
+        
+        for item in accept_encoding.split(','):
+            coding, _, params = item.strip().partition(';')
+            coding = coding.strip().lower()
+            quality = 1.0
+            params = params.strip()
+            if params.startswith('q='):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            
+            if coding == 'gzip':
+                return quality > 0
+            if coding == '*':
+                wildcard = quality > 0
+        
+        return wildcard
+    
+    def etag_matches(self, etag):
+        """Check the If-None-Match request header against an ETag"""
+        if_none_match = self.headers.get('If-None-Match')
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        
+        # If-None-Match uses the weak comparison, so ignore W/ prefixes
+        candidates = (tag.strip() for tag in if_none_match.split(','))
+        return any(tag[2:] == etag if tag.startswith('W/') else tag == etag for tag in candidates)
+    
+    def send_body(self, status, body, content_type, headers=None):
+        """Send a complete uncached response with Content-Length"""
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.write_body(body)
+    
+    def write_body(self, body):
+        """Write a response body unless this is a HEAD request"""
+        if not self.head_only:
+            self.wfile.write(body)
+    
+    def send_file(self, path, offset, count):
+        """Write part of a file as response body, zero-copy via sendfile where possible"""
+        if self.head_only or count <= 0:
+            return
+        
+        with open(path, 'rb') as f:
+            if self.connection is not None:
+                # Headers are already flushed by end_headers, the kernel copies the rest
+                self.connection.sendfile(f, offset, count)
+            else:
+                f.seek(offset)
+                self.wfile.write(f.read(count))
+    
+    def send_payload(self, body, content_type, headers=None):
+        """Send a freshly built body with ETag and content negotiation"""
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_cached(CachedResponse(body, content_type), headers)
+    
+    def send_cached(self, cached, headers=None):
+        """Send a cached response, gzip-encoded if accepted, 304 if unchanged"""
+        headers = dict(cached.headers, **(headers or {}))
+        body = cached.body
+        etag = cached.etag
+        encoding = None
+        
+        # Precompressed assets always qualify, dynamic bodies only above the threshold,
+        # images are compressed already
+        compressible = not cached.content_type.startswith('image/')
+        if cached.gzip_body is not None or (compressible and len(body) >= config.web['gzip_min_size']):
+            headers['Vary'] = 'Accept-Encoding'
+            if self.accepts_gzip():
+                body = cached.compress()
+                etag = cached.gzip_etag
+                encoding = 'gzip'
+        
+        if self.etag_matches(etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
         
         self.send_response(200)
-        self.send_header('Content-Type', 'text/html; charset=utf-8')
-        self.send_header('Content-Length', str(len(html_content.encode('utf-8'))))
+        self.send_header('Content-Type', cached.content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        for name, value in headers.items():
+            self.send_header(name, value)
         self.end_headers()
-        self.wfile.write(html_content.encode('utf-8'))
+        self.write_body(body)
     
     def serve_current_slide_data(self):
         """Serve current slide data as JSON"""
         try:
-            current_slide_id = getattr(web_server, 'current_slide_id', 1)
-            slide = content_manager.get_slide(current_slide_id)
-            
-            if slide:
-                slide_data = {
-                    'slide_id': current_slide_id,
-                    'title': slide.title,
-                    'content': slide.content,
-                    'total_slides': content_manager.get_slide_count(),
-                    'timestamp': datetime.now().isoformat()
-                }
-                
-                # Add canvas elements if available
-                if hasattr(slide, 'extra_data') and slide.extra_data:
-                    canvas_elements = slide.extra_data.get('canvas_elements', [])
-                    # Convert image paths to web-accessible URLs
-                    for element in canvas_elements:
-                        if element['type'] == 'image' and 'relative_path' in element:
-                            element['web_url'] = f"/api/image/{element['relative_path']}"
-                    
-                    slide_data['canvas_elements'] = canvas_elements
-                
-                response = json.dumps(slide_data, ensure_ascii=False)
-            else:
-                response = json.dumps({'error': 'Slide not found'})
-            
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Content-Length', str(len(response.encode('utf-8'))))
-            self.end_headers()
-            self.wfile.write(response.encode('utf-8'))
+            # Read the version first, a change in between only causes one extra poll
+            state_version = self.room.state_version
+            current_slide_id = self.room.current_slide_id
+            self.send_slide_response(current_slide_id, {
+                'X-State-Version': str(state_version),
+                'X-Switch-At': str(self.room.switch_at)
+            })
             
         except Exception as e:
             logger.error(f"Error serving current slide data: {e}")
@@ -128,116 +728,338 @@ class PresentationRequestHandler(BaseHTTPRequestHandler):
     def serve_slide_data(self, slide_id):
         """Serve specific slide data"""
         try:
-            slide = content_manager.get_slide(slide_id)
-            
-            if slide:
-                slide_data = {
-                    'slide_id': slide_id,
-                    'title': slide.title,
-                    'content': slide.content,
-                    'total_slides': content_manager.get_slide_count(),
-                    'timestamp': datetime.now().isoformat()
-                }
-                
-                # Add canvas elements if available
-                if hasattr(slide, 'extra_data') and slide.extra_data:
-                    canvas_elements = slide.extra_data.get('canvas_elements', [])
-                    # Convert image paths to web-accessible URLs
-                    for element in canvas_elements:
-                        if element['type'] == 'image' and 'relative_path' in element:
-                            element['web_url'] = f"/api/image/{element['relative_path']}"
-                    
-                    slide_data['canvas_elements'] = canvas_elements
-                
-                response = json.dumps(slide_data, ensure_ascii=False)
-            else:
-                response = json.dumps({'error': 'Slide not found'})
-            
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(response.encode('utf-8'))
+            self.send_slide_response(slide_id)
             
         except Exception as e:
             logger.error(f"Error serving slide {slide_id}: {e}")
             self.send_500()
     
+    def serve_bundle(self):
+        """Serve every slide in one versioned manifest for client-side navigation"""
+        try:
+            self.send_cached(self.room.get_bundle_response(), {'Cache-Control': 'no-cache'})
+            
+        except Exception as e:
+            logger.error(f"Error serving bundle: {e}")
+            self.send_500()
+    
+    def serve_changes(self, query_params):
+        """Serve the slides changed since a sequence number of the change log"""
+        try:
+            try:
+                since = int(query_params.get('since', [0])[0])
+            except ValueError:
+                self.send_body(400, 'since must be an integer', 'text/plain; charset=utf-8')
+                return
+            
+            epoch = query_params.get('epoch', [None])[0]
+            changes = self.room.get_changes(since, epoch)
+            self.send_payload(json.dumps(changes, ensure_ascii=False), JSON_CONTENT_TYPE, {
+                'Access-Control-Allow-Origin': '*',
+                'Cache-Control': 'no-cache'
+            })
+            
+        except Exception as e:
+            logger.error(f"Error serving changes: {e}")
+            self.send_500()
+    
+    def serve_slide_render(self, slide_id, query_params):
+        """Serve a slide rasterized like the main display as PNG"""
+        try:
+            try:
+                slide_id = int(slide_id)
+                width = int(query_params.get('w', [config.web['render_default_width']])[0])
+                if width <= 0:
+                    raise ValueError(f"Invalid width {width}")
+            except ValueError as e:
+                self.send_body(400, str(e), 'text/plain; charset=utf-8')
+                return
+            
+            cached = self.room.get_slide_render(slide_id, width)
+            if cached is None:
+                self.send_body(404, SLIDE_NOT_FOUND_BODY, JSON_CONTENT_TYPE)
+                return
+            self.send_cached(cached, {'Cache-Control': 'no-cache'})
+            
+        except Exception as e:
+            logger.error(f"Error rendering slide {slide_id}: {e}")
+            self.send_500()
+    
+    def send_slide_response(self, slide_id, extra_headers=None):
+        """Send the pre-serialized JSON of a slide from the response cache"""
+        headers = {
+            'Access-Control-Allow-Origin': '*',
+            'Cache-Control': 'no-cache'
+        }
+        headers.update(extra_headers or {})
+        
+        cached = self.room.get_slide_response(slide_id)
+        if cached:
+            self.send_cached(cached, headers)
+        else:
+            self.send_payload(SLIDE_NOT_FOUND_BODY, JSON_CONTENT_TYPE, headers)
+    
+    def serve_metrics(self):
+        """Serve request and cache metrics in Prometheus text format"""
+        body = web_metrics.render(web_server.get_metric_samples())
+        self.send_body(200, body, PROMETHEUS_CONTENT_TYPE, {'Cache-Control': 'no-store'})
+    
+    def serve_time(self):
+        """Time-sync exchange: receive and transmit timestamps for NTP-style offset estimation"""
+        received = self.request_received_time()
+        # Taken last, everything before it counts as server processing time
+        body = json.dumps({'received': round(received, 3), 'sent': round(server_time_ms(), 3)})
+        self.send_body(200, body, JSON_CONTENT_TYPE, {'Cache-Control': 'no-store'})
+    
     def serve_slides_list(self):
         """Serve list of all slides"""
         try:
-            slides = content_manager.get_all_slides()
-            slides_list = []
-            
-            for slide_id, slide in slides.items():
-                slides_list.append({
-                    'slide_id': slide_id,
-                    'title': slide.title,
-                    'content': slide.content[:100] + "..." if len(slide.content) > 100 else slide.content
-                })
-            
-            response = json.dumps({
-                'slides': slides_list,
-                'total': len(slides_list),
-                'current': getattr(web_server, 'current_slide_id', 1)
-            }, ensure_ascii=False)
-            
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(response.encode('utf-8'))
+            cached = self.room.get_slides_list_response()
+            self.send_cached(cached, {
+                'Access-Control-Allow-Origin': '*',
+                'Cache-Control': 'no-cache'
+            })
             
         except Exception as e:
             logger.error(f"Error serving slides list: {e}")
             self.send_500()
     
-    def serve_image(self, image_path):
-        """Serve slide images"""
+    def acquire_stream_slot(self, kind='stream'):
+        """Reserve the worker for a stream or long-poll, answer 503 if the pool is exhausted"""
+        acquire = getattr(self.server, 'acquire_stream_slot', None)
+        if acquire is None or acquire(kind):
+            return True
+        
+        # Close as well, the point is to give the worker back
+        self.send_body(503, b'Too many open streams', 'text/plain', {
+            'Retry-After': str(config.web['retry_after']),
+            'Connection': 'close'
+        })
+        return False
+    
+    def release_stream_slot(self, kind='stream'):
+        """Release a slot taken by acquire_stream_slot"""
+        release = getattr(self.server, 'release_stream_slot', None)
+        if release is not None:
+            release(kind)
+    
+    def serve_event_stream(self):
+        """Stream navigation and content events as Server-Sent Events"""
+        if not self.acquire_stream_slot():
+            return
+        
+        subscriber = self.room.subscribe_events()
+        # HTTP/1.1 streams are chunked, HTTP/1.0 clients get a close-delimited body
+        chunked = self.request_version != 'HTTP/1.0'
         try:
-            full_path = os.path.join("data", "images", image_path)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            if chunked:
+                self.send_header('Transfer-Encoding', 'chunked')
+            else:
+                self.send_header('Connection', 'close')
+            self.end_headers()
+            self.write_stream_data(f"retry: {config.web['sse_retry_ms']}\n\n".encode('utf-8'), chunked)
             
-            if os.path.exists(full_path):
-                with open(full_path, 'rb') as f:
-                    image_data = f.read()
+            keepalive_interval = config.web['sse_keepalive_interval']
+            while web_server.running:
+                try:
+                    event = subscriber.get(timeout=keepalive_interval)
+                except queue.Empty:
+                    # Comment line keeps proxies and idle tablets from dropping the stream
+                    self.write_stream_data(b': keepalive\n\n', chunked)
+                    continue
                 
-                self.send_response(200)
-                self.send_header('Content-Type', 'image/png')
-                self.send_header('Content-Length', str(len(image_data)))
-                self.send_header('Cache-Control', 'max-age=3600')
-                self.end_headers()
-                self.wfile.write(image_data)
-            else:
+                if event is None:
+                    break
+                
+                # Serialized once by the broadcaster for every subscriber
+                self.wfile.write(event.chunked_frame if chunked else event.frame)
+            
+            if subscriber.evicted:
+                # Buffer overflowed, the tablet is too slow, it resyncs after reconnecting
+                logger.debug("Event stream client evicted")
+            elif chunked:
+                # Server shutdown: terminate the chunked body cleanly
+                self.wfile.write(b'0\r\n\r\n')
+            self.close_connection = True
+            
+        except OSError:
+            # Broken pipe, reset or a write timeout on a stalled tablet
+            logger.debug("Event stream client disconnected")
+            self.close_connection = True
+        finally:
+            self.room.unsubscribe_events(subscriber)
+            self.release_stream_slot()
+    
+    def write_stream_data(self, data, chunked):
+        """Write a piece of a streamed body, framed as chunk if required"""
+        if chunked:
+            self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b'\r\n')
+        else:
+            self.wfile.write(data)
+    
+    def handle_websocket(self):
+        """Upgrade to WebSocket and handle control commands on one connection"""
+        key = self.headers.get('Sec-WebSocket-Key')
+        if self.headers.get('Upgrade', '').lower() != 'websocket' or not key:
+            self.send_body(400, b'WebSocket upgrade expected', 'text/plain')
+            return
+        if not self.acquire_stream_slot():
+            return
+        
+        self.send_response(101, 'Switching Protocols')
+        self.send_header('Upgrade', 'websocket')
+        self.send_header('Connection', 'Upgrade')
+        self.send_header('Sec-WebSocket-Accept', compute_accept_key(key))
+        self.end_headers()
+        self.close_connection = True
+        
+        # Idle WebSockets are normal, the keep-alive timeout must not apply
+        self.connection.settimeout(None)
+        connection = WebSocketConnection(self.rfile, self.wfile)
+        try:
+            while web_server.running:
+                message = connection.receive()
+                if message is None:
+                    break
+                connection.send_text(self.handle_websocket_message(message, self.room, self.client_address[0]))
+                
+        except (WebSocketError, ConnectionError, UnicodeDecodeError) as e:
+            logger.debug(f"WebSocket connection closed: {e}")
+        finally:
+            connection.close()
+            self.release_stream_slot()
+    
+    @staticmethod
+    def handle_websocket_message(message, room, client):
+        """Execute a WebSocket command in a room and return the acknowledgement with the new state"""
+        command_id = None
+        try:
+            command_data = json.loads(message)
+            command_id = command_data.get('id')
+            action = command_data.get('action')
+            
+            # 'state' only asks for the current slide without navigating
+            if action != 'state':
+                retry_after = web_server.control_limiter.acquire(client)
+                if retry_after:
+                    return json.dumps({'type': 'ack', 'id': command_id, 'status': 'error',
+                                       'error': 'rate_limited', 'retry_after': round(retry_after, 3)})
+                slide_id = command_data.get('slide')
+                room.execute_command(action, int(slide_id) if slide_id is not None else None)
+            
+            ack = json.dumps({
+                'type': 'ack',
+                'id': command_id,
+                'status': 'success',
+                'action': action,
+                'version': room.state_version
+            }, ensure_ascii=False)
+            
+            # Splice in the cached slide JSON instead of serializing it again
+            cached = room.get_slide_response(room.current_slide_id)
+            slide_json = cached.body.decode('utf-8') if cached else 'null'
+            return f'{ack[:-1]}, "slide": {slide_json}}}'
+            
+        except Exception as e:
+            logger.error(f"Error handling WebSocket command: {e}")
+            return json.dumps({'type': 'ack', 'id': command_id, 'status': 'error', 'error': str(e)})
+    
+    def serve_image(self, image_path, query_params=None):
+        """Serve slide images, resized variants via ?w=<px>&fmt=webp|jpeg"""
+        try:
+            full_path = web_server.resolve_image_path(image_path)
+            if not full_path:
                 self.send_404()
+                return
+            
+            content_type = None
+            query_params = query_params or {}
+            if 'w' in query_params:
+                try:
+                    width = int(query_params['w'][0])
+                    fmt = query_params.get('fmt', ['jpeg'])[0].lower().replace('jpg', 'jpeg')
+                    if width <= 0 or fmt not in VARIANT_FORMATS:
+                        raise ValueError(f"Invalid variant w={width} fmt={fmt}")
+                except ValueError as e:
+                    self.send_body(400, str(e), 'text/plain; charset=utf-8')
+                    return
+                full_path, content_type = image_variants.get_variant(full_path, width, fmt)
+            
+            self.serve_file(full_path, content_type)
                 
         except Exception as e:
             logger.error(f"Error serving image {image_path}: {e}")
             self.send_500()
     
+    def serve_file(self, full_path, content_type=None):
+        """Send a file with ETag, Range (206) and HEAD support"""
+        stat = os.stat(full_path)
+        size = stat.st_size
+        etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+        headers = {
+            'ETag': etag,
+            'Accept-Ranges': 'bytes',
+            'Cache-Control': 'max-age=3600'
+        }
+        
+        if self.etag_matches(etag):
+            self.send_response(304)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+        
+        # If-Range: only resume when the client still has the same file
+        byte_range = None
+        range_header = self.headers.get('Range')
+        if range_header and self.headers.get('If-Range', etag) == etag:
+            try:
+                byte_range = parse_byte_range(range_header, size)
+            except RangeNotSatisfiable:
+                headers['Content-Range'] = f'bytes */{size}'
+                self.send_body(416, b'', 'text/plain', headers)
+                return
+        
+        start, end = byte_range or (0, size - 1)
+        if byte_range:
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', content_type or web_server.get_image_content_type(full_path, stat))
+        self.send_header('Content-Length', str(end - start + 1))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.send_file(full_path, start, end - start + 1)
+    
+    def check_control_rate(self):
+        """Take a token of the client's bucket, answer 429 and return False when it is empty"""
+        retry_after = web_server.control_limiter.acquire(self.client_address[0])
+        if not retry_after:
+            return True
+        
+        # Rejected before parsing or touching the room, spamming stays cheap
+        self.send_body(429, RATE_LIMITED_BODY, 'application/json', {
+            'Retry-After': str(math.ceil(retry_after)),
+            'Access-Control-Allow-Origin': '*'
+        })
+        return False
+    
     def handle_control_command(self, query_params):
         """Handle control commands from tablet via GET"""
         try:
             action = query_params.get('action', [''])[0]
-            
-            if action == 'next':
-                web_server.next_slide()
-            elif action == 'prev':
-                web_server.previous_slide()
-            elif action == 'goto':
-                slide_id = int(query_params.get('slide', [1])[0])
-                web_server.goto_slide(slide_id)
-            elif action == 'play':
-                web_server.start_demo()
-            elif action == 'stop':
-                web_server.stop_demo()
+            slide_id = int(query_params.get('slide', [1])[0]) if action == 'goto' else None
+            self.room.execute_command(action, slide_id)
             
             # Return success response
             response = json.dumps({'status': 'success', 'action': action})
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(response.encode('utf-8'))
+            self.send_body(200, response, 'application/json', {'Access-Control-Allow-Origin': '*'})
             
         except Exception as e:
             logger.error(f"Error handling control command: {e}")
@@ -247,564 +1069,782 @@ class PresentationRequestHandler(BaseHTTPRequestHandler):
         """Handle control commands from tablet via POST"""
         try:
             action = command_data.get('action')
-            
-            if action == 'next':
-                web_server.next_slide()
-            elif action == 'prev':
-                web_server.previous_slide()
-            elif action == 'goto':
-                slide_id = int(command_data.get('slide', 1))
-                web_server.goto_slide(slide_id)
-            elif action == 'play':
-                web_server.start_demo()
-            elif action == 'stop':
-                web_server.stop_demo()
+            slide_id = int(command_data.get('slide', 1)) if action == 'goto' else None
+            self.room.execute_command(action, slide_id)
             
             # Return success response
             response = json.dumps({'status': 'success', 'action': action})
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(response.encode('utf-8'))
+            self.send_body(200, response, 'application/json', {'Access-Control-Allow-Origin': '*'})
             
         except Exception as e:
             logger.error(f"Error handling POST control command: {e}")
             self.send_500()
     
-    def serve_css(self):
-        """Serve CSS styles for tablet interface"""
-        css_content = """
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
+    def serve_static_asset(self, filename):
+        """Serve CSS/JavaScript of the tablet interface, fingerprinted names never change"""
+        asset = web_server.fingerprinted_assets.get(filename)
+        if asset is not None:
+            self.send_cached(asset, {'Cache-Control': IMMUTABLE_CACHE_CONTROL})
+        elif filename in UNVERSIONED_ASSETS:
+            # Pages and service workers of older builds still ask for the plain names
+            self.send_cached(web_server.get_static_asset(filename), {'Cache-Control': 'no-cache'})
+        else:
+            self.send_404()
+    
+    def serve_service_worker(self):
+        """Serve the service worker, always revalidated so new builds are picked up"""
+        self.send_cached(web_server.get_static_asset('sw.js'), {
+            'Cache-Control': 'no-cache',
+            'Service-Worker-Allowed': '/'
+        })
+    
+    @staticmethod
+    def render_slide_html(slide_data):
+        """Server-side twin of renderSlide() in script.js, text escaped"""
+        images = []
+        for element in slide_data.get('canvas_elements', []):
+            if element['type'] != 'image' or not element.get('web_url'):
+                continue
+            url = html.escape(element['web_url'])
+            # The format is picked in the browser, the script decides the same way after hydration
+            sources = {fmt: ', '.join(f"{url}&amp;w={width}&amp;fmt={fmt} {width}w" for width in element['web_widths'])
+                       for fmt in ('webp', 'jpeg')}
+            images.append(
+                f'<picture><source type="image/webp" srcset="{sources["webp"]}" sizes="200px">'
+                f'<img src="{url}" srcset="{sources["jpeg"]}" sizes="200px" class="slide-image" alt="Slide Image">'
+                f'</picture>')
         
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #1e3c72 0%, #2a5298 100%);
-            color: white;
-            overflow-x: hidden;
-            touch-action: manipulation;
-        }
+        images_html = f'<div class="slide-images">{"".join(images)}</div>' if images else ''
+        return (
+            '<div class="slide-content">'
+            f'<h1 class="slide-title">{html.escape(slide_data.get("title") or "Untitled")}</h1>'
+            f'<div class="slide-text">{html.escape(slide_data.get("content") or "")}</div>'
+            f'{images_html}'
+            '</div>'
+        )
+    
+    @staticmethod
+    def get_presentation_html(asset_urls, slide_html='<div class="loading">Lädt Präsentation...</div>',
+                              slide_info='Folie 1 von 1', initial_state='null'):
+        """Generate the main presentation HTML page, optionally with a pre-rendered slide"""
+        page = """<!DOCTYPE html>
+<html lang="de">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Bertrandt Präsentation - Tablet View</title>
+    <link rel="stylesheet" href="__STYLE_URL__">
+</head>
+<body>
+    <div class="refresh-indicator" id="refreshIndicator">🔄 Aktualisiert</div>
+    
+    <div class="presentation-container">
+        <div class="header">
+            <div class="logo">🚗 BERTRANDT Dynamic Messe Stand V4</div>
+            <div class="controls">
+                <button class="btn" id="refreshBtn">🔄 Aktualisieren</button>
+                <button class="btn btn-primary" id="playBtn">▶ Demo</button>
+            </div>
+        </div>
         
-        .presentation-container {
-            max-width: 100vw;
-            margin: 0 auto;
-            padding: 10px;
-            min-height: 100vh;
-            display: flex;
-            flex-direction: column;
-        }
+        <div class="slide-container" id="slideContent">__SLIDE_HTML__</div>
         
-        .header {
-            background: rgba(255, 255, 255, 0.1);
-            backdrop-filter: blur(10px);
-            border-radius: 12px;
-            padding: 15px;
-            margin-bottom: 15px;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            flex-wrap: wrap;
+        <div class="navigation">
+            <div class="slide-info" id="slideInfo">__SLIDE_INFO__</div>
+            <div class="nav-buttons">
+                <button class="btn" id="prevBtn">◀ Zurück</button>
+                <button class="btn" id="nextBtn">Weiter ▶</button>
+            </div>
+        </div>
+    </div>
+    
+    <script type="application/json" id="initialState">__INITIAL_STATE__</script>
+    <script src="__SCRIPT_URL__"></script>
+    <script>
+        // Browsers only allow service workers in secure contexts (HTTPS or localhost)
+        if ('serviceWorker' in navigator && window.isSecureContext) {
+            navigator.serviceWorker.register('/sw.js').catch(error => console.error('Service worker registration failed:', error));
         }
-        
-        .logo {
-            font-size: 18px;
-            font-weight: bold;
-            color: #ffffff;
+    </script>
+</body>
+</html>"""
+        values = {
+            'STYLE_URL': asset_urls['style.css'],
+            'SCRIPT_URL': asset_urls['script.js'],
+            'SLIDE_HTML': slide_html,
+            'SLIDE_INFO': slide_info,
+            'INITIAL_STATE': initial_state
         }
+        return PAGE_PLACEHOLDER_PATTERN.sub(lambda match: values[match.group(1)], page)
+    
+    def send_404(self):
+        """Send 404 Not Found response"""
+        self.send_body(404, b'<h1>404 Not Found</h1>', 'text/html')
+    
+    def send_500(self):
+        """Send 500 Internal Server Error response"""
+        # A response may already be half written, do not reuse the connection
+        self.send_body(500, b'<h1>500 Internal Server Error</h1>', 'text/html', {'Connection': 'close'})
+    
+    def log_message(self, format, *args):
+        """Override to use our logger instead of stderr"""
+        logger.debug(f"HTTP: {format % args}")
+
+class PresentationRoom:
+    """Eine Präsentation mit eigenem Content, Navigationszustand und Event-Verteilung"""
+    
+    def __init__(self, name, content, server):
+        self.name = name
+        self.content = content
+        self.server = server
+        # URL-Präfix der Raum-Routen, der Standardraum bleibt unter /
+        self.url_prefix = '' if name == DEFAULT_ROOM else f"/r/{name}"
+        self.current_slide_id = 1
         
-        .controls {
-            display: flex;
-            gap: 10px;
-            flex-wrap: wrap;
-        }
+        # Callbacks für slide control, laufen erst zur Umschaltzeit (ein Thread, Reihenfolge bleibt)
+        self.slide_change_callbacks = []
+        self.callback_executor = None
         
-        .btn {
-            padding: 10px 15px;
-            border: none;
-            border-radius: 8px;
-            background: rgba(255, 255, 255, 0.2);
-            color: white;
-            cursor: pointer;
-            font-size: 14px;
-            font-weight: 500;
-            transition: all 0.3s ease;
-            min-width: 60px;
-            text-align: center;
-        }
+        # Serverzeit (ms), zu der alle Clients die letzte Navigation zeigen
+        self.switch_at = 0
         
-        .btn:hover, .btn:active {
-            background: rgba(255, 255, 255, 0.3);
-            transform: translateY(-2px);
-        }
+        # Navigation-Bursts (schnelles Wischen) werden zu einem goto zusammengefasst
+        self.pending_navigation = None
+        self.pending_navigation_count = 0
+        self.navigation_timer = None
+        self.navigation_lock = threading.Lock()
+        self.navigation_flush_lock = threading.Lock()
         
-        .btn-primary {
-            background: #FF6600;
-        }
+        # Event-Stream Abonnenten (Server-Sent Events), nur dieser Raum
+        self.broadcaster = Broadcaster(config.web['broadcast_buffer_size'])
         
-        .btn-primary:hover {
-            background: #e55a00;
-        }
+        # Monoton steigende Zustandsversion (Navigation + Content-Änderungen)
+        self.state_version = 0
+        self.state_condition = threading.Condition()
         
-        .slide-container {
-            flex: 1;
-            background: white;
-            border-radius: 12px;
-            margin-bottom: 15px;
-            overflow: hidden;
-            box-shadow: 0 8px 32px rgba(0, 0, 0, 0.2);
-            min-height: 400px;
-            position: relative;
-        }
+        # Version des Folieninhalts, Teil von /api/bundle
+        self.content_version = 0
         
-        .slide-content {
-            padding: 30px;
-            height: 100%;
-            display: flex;
-            flex-direction: column;
-        }
+        # Begrenztes Änderungsprotokoll für /api/changes, epoch erkennt Server-Neustarts
+        self.change_log = deque(maxlen=config.web['change_log_size'])
+        self.change_seq = 0
+        self.change_lock = threading.Lock()
+        self.change_epoch = format(int(time.time() * 1000), 'x')
         
-        .slide-title {
-            font-size: 28px;
-            font-weight: bold;
-            color: #1E88E5;
-            margin-bottom: 20px;
-            text-align: center;
-            border-bottom: 3px solid #FF6600;
-            padding-bottom: 10px;
-        }
+        # Fertig serialisierte Antworten pro Slide, invalidiert über on_content_changed
+        self.response_cache = {}
+        self.cache_lock = threading.Lock()
+        self.cache_generation = 0
+        self.cache_slide_count = None
+        self.cache_stats = {'hits': 0, 'misses': 0}
         
-        .slide-text {
-            font-size: 16px;
-            line-height: 1.6;
-            color: #1F1F1F;
-            flex: 1;
-            white-space: pre-line;
-        }
+        # Content manager observer hinzufügen
+        content.add_observer(self.on_content_changed)
+    
+    @property
+    def running(self):
+        """Rooms live as long as the server runs"""
+        return self.server.running
+    
+    def close(self):
+        """End event streams, pending navigation and long-polls of a stopped server"""
+        self.broadcaster.close()
+        self._cancel_navigation_window()
+        with self.navigation_lock:
+            if self.callback_executor:
+                self.callback_executor.shutdown(wait=False)
+                self.callback_executor = None
         
-        .slide-images {
-            display: flex;
-            flex-wrap: wrap;
-            gap: 15px;
-            margin-top: 20px;
+        with self.state_condition:
+            self.state_condition.notify_all()
+    
+    def get_info(self):
+        """Navigation state of the room for get_server_info"""
+        return {
+            'path': f"{self.url_prefix}/",
+            'current_slide': self.current_slide_id,
+            'state_version': self.state_version,
+            'total_slides': self.content.get_slide_count(),
+            'event_subscribers': len(self.broadcaster)
         }
+    
+    def add_slide_change_callback(self, callback):
+        """Add callback for slide changes from web interface"""
+        self.slide_change_callbacks.append(callback)
+    
+    def subscribe_events(self, subscriber=None):
+        """Register an event stream subscriber (anything with offer() and close()) and return it"""
+        return self.broadcaster.subscribe(subscriber)
+    
+    def unsubscribe_events(self, subscriber):
+        """Remove an event stream subscriber"""
+        self.broadcaster.unsubscribe(subscriber)
+    
+    def _bump_state_version(self):
+        """Increment the state version and wake up waiting long-polls"""
+        with self.state_condition:
+            self.state_version += 1
+            self.state_condition.notify_all()
+            return self.state_version
+    
+    def wait_for_state_change(self, since, timeout):
+        """Block until the state version differs from since or the timeout elapses"""
+        with self.state_condition:
+            # '!=' instead of '>' so clients resync after a server restart
+            self.state_condition.wait_for(
+                lambda: self.state_version != since or not self.running, timeout)
+            return self.state_version
+    
+    def _publish_event(self, event_type, data):
+        """Bump the state version and push an event to all stream subscribers"""
+        data['version'] = self._bump_state_version()
+        self.broadcaster.publish(event_type, data)
+    
+    def build_slide_data(self, slide_id):
+        """Build the JSON-ready data of a slide, None if it does not exist"""
+        slide = self.content.get_slide(slide_id)
+        if not slide:
+            return None
         
-        .slide-image {
-            max-width: 200px;
-            max-height: 150px;
-            border-radius: 8px;
-            box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);
+        slide_data = {
+            'slide_id': slide_id,
+            'title': slide.title,
+            'content': slide.content,
+            'total_slides': self.content.get_slide_count(),
+            # Modification time keeps the body stable for ETags
+            'timestamp': slide.modified_at.isoformat()
         }
         
-        .navigation {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            background: rgba(255, 255, 255, 0.1);
-            backdrop-filter: blur(10px);
-            border-radius: 12px;
-            padding: 15px;
-            margin-top: 10px;
-        }
+        # Add canvas elements if available
+        if hasattr(slide, 'extra_data') and slide.extra_data:
+            canvas_elements = []
+            for element in slide.extra_data.get('canvas_elements', []):
+                # Convert image paths to web-accessible URLs (on a copy, the slide stays untouched)
+                if element['type'] == 'image' and 'relative_path' in element:
+                    element = dict(element, web_url=self.server.get_image_url(element['relative_path']),
+                                   web_widths=config.web['image_variant_widths'])
+                canvas_elements.append(element)
+            
+            slide_data['canvas_elements'] = canvas_elements
         
-        .slide-info {
-            font-size: 16px;
-            font-weight: 500;
-        }
+        return slide_data
+    
+    def build_preload_headers(self, slide_data):
+        """Link preload hints for the images of a slide"""
+        links = []
+        for element in slide_data.get('canvas_elements', []):
+            if 'web_url' not in element:
+                continue
+            # Same candidates as the client's srcset, browsers with preload support decode WebP
+            url = element['web_url']
+            srcset = ', '.join(f"{url}&w={width}&fmt=webp {width}w" for width in element['web_widths'])
+            links.append(f'<{url}>; rel=preload; as=image; imagesrcset="{srcset}"; imagesizes="200px"')
         
-        .nav-buttons {
-            display: flex;
-            gap: 10px;
-        }
+        return {'Link': ', '.join(links)} if links else None
+    
+    def build_slides_list(self):
+        """Build the JSON-ready overview of all slides"""
+        slides = self.content.get_all_slides()
+        slides_list = []
         
-        .loading {
-            text-align: center;
-            padding: 50px;
-            font-size: 18px;
-            color: rgba(255, 255, 255, 0.7);
-        }
+        for slide_id, slide in slides.items():
+            slides_list.append({
+                'slide_id': slide_id,
+                'title': slide.title,
+                'content': slide.content[:100] + "..." if len(slide.content) > 100 else slide.content
+            })
         
-        .error {
-            text-align: center;
-            padding: 50px;
-            color: #ff6b6b;
-            font-size: 18px;
+        return {
+            'slides': slides_list,
+            'total': len(slides_list),
+            'current': self.current_slide_id
         }
+    
+    def build_bundle(self):
+        """Build the JSON-ready manifest of all slides including layout and image URLs"""
+        slides = []
+        for slide_id in sorted(self.content.get_all_slides()):
+            slide_data = self.build_slide_data(slide_id)
+            if slide_data:
+                slides.append(slide_data)
         
-        @media (max-width: 768px) {
-            .presentation-container {
-                padding: 5px;
-            }
-            
-            .slide-content {
-                padding: 20px;
-            }
-            
-            .slide-title {
-                font-size: 24px;
-            }
-            
-            .slide-text {
-                font-size: 14px;
-            }
-            
-            .controls, .nav-buttons {
-                flex-direction: column;
-                width: 100%;
-            }
-            
-            .btn {
-                width: 100%;
-                margin-bottom: 5px;
-            }
+        return {
+            'version': self.content_version,
+            'total_slides': len(slides),
+            'slides': slides
         }
+    
+    def record_change(self, slide_id, action):
+        """Append a slide change to the change log and return its sequence number"""
+        with self.change_lock:
+            self.change_seq += 1
+            self.change_log.append((self.change_seq, slide_id, action))
+            return self.change_seq
+    
+    def get_changes(self, since, epoch=None):
+        """Slides changed after sequence number since, or a resync answer if the log cannot tell"""
+        with self.change_lock:
+            seq = self.change_seq
+            entries = list(self.change_log)
         
-        /* Auto-refresh indicator */
-        .refresh-indicator {
-            position: fixed;
-            top: 10px;
-            right: 10px;
-            background: rgba(0, 255, 0, 0.7);
-            color: white;
-            padding: 5px 10px;
-            border-radius: 15px;
-            font-size: 12px;
-            opacity: 0;
-            transition: opacity 0.3s ease;
-        }
+        result = {'epoch': self.change_epoch, 'seq': seq, 'total_slides': self.content.get_slide_count()}
         
-        .refresh-indicator.active {
-            opacity: 1;
-        }
-        """
+        # Entries after since must all still be in the log, the deque drops the oldest
+        first_seq = entries[0][0] if entries else seq + 1
+        if (epoch and epoch != self.change_epoch) or since > seq or since < first_seq - 1:
+            result['resync'] = True
+            return result
         
-        self.send_response(200)
-        self.send_header('Content-Type', 'text/css')
-        self.send_header('Content-Length', str(len(css_content.encode('utf-8'))))
-        self.end_headers()
-        self.wfile.write(css_content.encode('utf-8'))
-    
-    def serve_javascript(self):
-        """Serve JavaScript for tablet interface"""
-        js_content = """
-        class BertrandtPresentation {
-            constructor() {
-                this.currentSlide = 1;
-                this.totalSlides = 1;
-                this.autoRefresh = true;
-                this.refreshInterval = 3000; // 3 seconds
-                this.init();
-            }
-            
-            init() {
-                this.loadCurrentSlide();
-                this.setupEventListeners();
-                this.startAutoRefresh();
-                this.setupSwipeGestures();
-            }
-            
-            setupEventListeners() {
-                // Navigation buttons
-                document.getElementById('prevBtn').addEventListener('click', () => this.previousSlide());
-                document.getElementById('nextBtn').addEventListener('click', () => this.nextSlide());
-                document.getElementById('playBtn').addEventListener('click', () => this.toggleDemo());
-                document.getElementById('refreshBtn').addEventListener('click', () => this.loadCurrentSlide());
-                
-                // Keyboard navigation
-                document.addEventListener('keydown', (e) => {
-                    switch(e.key) {
-                        case 'ArrowLeft':
-                            this.previousSlide();
-                            break;
-                        case 'ArrowRight':
-                        case ' ':
-                            this.nextSlide();
-                            break;
-                        case 'Home':
-                            this.gotoSlide(1);
-                            break;
-                        case 'End':
-                            this.gotoSlide(this.totalSlides);
-                            break;
-                    }
-                });
-            }
-            
-            setupSwipeGestures() {
-                let startX, startY, endX, endY;
-                const slideContainer = document.querySelector('.slide-container');
-                
-                slideContainer.addEventListener('touchstart', (e) => {
-                    startX = e.touches[0].clientX;
-                    startY = e.touches[0].clientY;
-                });
-                
-                slideContainer.addEventListener('touchend', (e) => {
-                    if (!startX || !startY) return;
-                    
-                    endX = e.changedTouches[0].clientX;
-                    endY = e.changedTouches[0].clientY;
-                    
-                    const deltaX = startX - endX;
-                    const deltaY = startY - endY;
-                    
-                    // Horizontal swipe
-                    if (Math.abs(deltaX) > Math.abs(deltaY)) {
-                        if (Math.abs(deltaX) > 50) { // Minimum swipe distance
-                            if (deltaX > 0) {
-                                this.nextSlide(); // Swipe left = next
-                            } else {
-                                this.previousSlide(); // Swipe right = previous
-                            }
-                        }
-                    }
-                    
-                    startX = startY = endX = endY = null;
-                });
-            }
-            
-            async loadCurrentSlide() {
-                try {
-                    this.showRefreshIndicator();
-                    const response = await fetch('/api/current_slide');
-                    const data = await response.json();
-                    
-                    if (data.error) {
-                        this.showError(data.error);
-                        return;
-                    }
-                    
-                    this.currentSlide = data.slide_id;
-                    this.totalSlides = data.total_slides;
-                    this.renderSlide(data);
-                    this.updateNavigation();
-                    
-                } catch (error) {
-                    console.error('Error loading slide:', error);
-                    this.showError('Verbindungsfehler beim Laden der Folie');
-                }
-            }
-            
-            async loadSlide(slideId) {
-                try {
-                    const response = await fetch(`/api/slide?id=${slideId}`);
-                    const data = await response.json();
-                    
-                    if (data.error) {
-                        this.showError(data.error);
-                        return;
-                    }
-                    
-                    this.currentSlide = data.slide_id;
-                    this.renderSlide(data);
-                    this.updateNavigation();
-                    
-                } catch (error) {
-                    console.error('Error loading slide:', error);
-                    this.showError('Fehler beim Laden der Folie');
-                }
-            }
-            
-            renderSlide(slideData) {
-                const container = document.getElementById('slideContent');
-                
-                let imagesHtml = '';
-                if (slideData.canvas_elements) {
-                    const imageElements = slideData.canvas_elements.filter(el => el.type === 'image');
-                    if (imageElements.length > 0) {
-                        imagesHtml = '<div class="slide-images">';
-                        imageElements.forEach(img => {
-                            if (img.web_url) {
-                                imagesHtml += `<img src="${img.web_url}" class="slide-image" alt="Slide Image">`;
-                            }
-                        });
-                        imagesHtml += '</div>';
-                    }
-                }
-                
-                container.innerHTML = `
-                    <div class="slide-content">
-                        <h1 class="slide-title">${slideData.title || 'Untitled'}</h1>
-                        <div class="slide-text">${slideData.content || ''}</div>
-                        ${imagesHtml}
-                    </div>
-                `;
-            }
-            
-            updateNavigation() {
-                document.getElementById('slideInfo').textContent = 
-                    `Folie ${this.currentSlide} von ${this.totalSlides}`;
-                
-                document.getElementById('prevBtn').disabled = this.currentSlide <= 1;
-                document.getElementById('nextBtn').disabled = this.currentSlide >= this.totalSlides;
-            }
-            
-            async sendCommand(action, slideId = null) {
-                try {
-                    const data = { action };
-                    if (slideId !== null) data.slide = slideId;
-                    
-                    const response = await fetch('/api/control', {
-                        method: 'POST',
-                        headers: {
-                            'Content-Type': 'application/json',
-                        },
-                        body: JSON.stringify(data)
-                    });
-                    
-                    const result = await response.json();
-                    if (result.status === 'success') {
-                        setTimeout(() => this.loadCurrentSlide(), 500);
-                    }
-                    
-                } catch (error) {
-                    console.error('Error sending command:', error);
-                }
-            }
-            
-            previousSlide() {
-                if (this.currentSlide > 1) {
-                    this.sendCommand('prev');
-                }
-            }
-            
-            nextSlide() {
-                if (this.currentSlide < this.totalSlides) {
-                    this.sendCommand('next');
-                }
-            }
-            
-            gotoSlide(slideId) {
-                if (slideId >= 1 && slideId <= this.totalSlides) {
-                    this.sendCommand('goto', slideId);
-                }
-            }
-            
-            toggleDemo() {
-                // Toggle demo mode (start/stop)
-                this.sendCommand('play');
-            }
+        # Only the latest action per slide matters
+        latest = {}
+        for entry_seq, slide_id, action in entries:
+            if entry_seq > since:
+                latest.pop(slide_id, None)
+                latest[slide_id] = action
+        
+        changes = []
+        for slide_id, action in latest.items():
+            slide_data = None if action == 'delete' else self.build_slide_data(slide_id)
+            changes.append({
+                'slide_id': slide_id,
+                'action': 'delete' if slide_data is None else 'upsert',
+                'slide': slide_data
+            })
+        
+        result['resync'] = False
+        result['changes'] = changes
+        return result
+    
+    def _get_cached_response(self, key, build, build_headers=None, serialize=None, content_type=JSON_CONTENT_TYPE):
+        """Look up a cached response or serialize build() once and store it, JSON unless serialize is given"""
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            self.cache_stats['hits'] += 1
+            return cached
+        
+        self.cache_stats['misses'] += 1
+        with self.cache_lock:
+            generation = self.cache_generation
+        
+        data = build()
+        if data is None:
+            return None
+        headers = build_headers(data) if build_headers else None
+        body = serialize(data) if serialize else json.dumps(data, ensure_ascii=False).encode('utf-8')
+        cached = CachedResponse(body, content_type, headers)
+        
+        # Only store if no invalidation happened while building
+        with self.cache_lock:
+            if generation == self.cache_generation and config.web['response_cache']:
+                self.response_cache[key] = cached
+                if self.cache_slide_count is None:
+                    self.cache_slide_count = self.content.get_slide_count()
+        return cached
+    
+    def get_slide_response(self, slide_id):
+        """Return the cached JSON response of a slide, None if it does not exist"""
+        return self._get_cached_response(
+            slide_id, lambda: self.build_slide_data(slide_id), self.build_preload_headers)
+    
+    def get_page_response(self, slide_id):
+        """Return the cached presentation page with the slide rendered in, None if it does not exist"""
+        # Tuple key: dropped on every slide update like the slides list
+        return self._get_cached_response(
+            ('page', slide_id), lambda: self.build_slide_data(slide_id), self.build_preload_headers,
+            serialize=self.render_page, content_type=HTML_CONTENT_TYPE)
+    
+    def render_page(self, slide_data):
+        """Render the presentation page for a slide, its data embedded for hydration"""
+        # '<' escaped so slide text can never close the script element
+        state = json.dumps({'slide': slide_data}, ensure_ascii=False).replace('<', '\\u003c')
+        page = PresentationRequestHandler.get_presentation_html(
+            self.server.get_asset_urls(),
+            PresentationRequestHandler.render_slide_html(slide_data),
+            f"Folie {slide_data['slide_id']} von {slide_data['total_slides']}",
+            state)
+        return page.encode('utf-8')
+    
+    def get_slides_list_response(self):
+        """Return the cached JSON response of the slides list for the current slide"""
+        current_slide_id = self.current_slide_id
+        return self._get_cached_response(('slides_list', current_slide_id), self.build_slides_list)
+    
+    def get_slide_render(self, slide_id, width):
+        """Return the cached PNG rendering of a slide, None if it does not exist"""
+        slide = self.content.get_slide(slide_id)
+        if not slide:
+            return None
+        
+        width = image_variants.normalize_width(width)
+        slide_data = {
+            'title': slide.title,
+            'content': slide.content,
+            'slide_number': slide_id,
+            'background_color': '#FFFFFF',
+            'text_color': '#1F1F1F'
+        }
+        # modified_at is the slide version, edits produce a new key
+        return self.server.get_cached_render(
+            (self.name, slide_id, slide.modified_at, width),
+            lambda: SlideRasterizer.render_slide_png(slide_data, width))
+    
+    def get_bundle_response(self):
+        """Return the cached JSON response of the whole presentation"""
+        # Tuple key: dropped together with the slides list on every slide update
+        return self._get_cached_response(('bundle',), self.build_bundle)
+    
+    def invalidate_response_cache(self, slide_id=None):
+        """Drop cached responses for one slide, or everything if slide_id is None"""
+        with self.cache_lock:
+            self.cache_generation += 1
             
-            startAutoRefresh() {
-                if (this.autoRefresh) {
-                    setInterval(() => {
-                        this.loadCurrentSlide();
-                    }, this.refreshInterval);
+            # total_slides is part of every slide body, so a count change invalidates all
+            slide_count = self.content.get_slide_count()
+            if slide_id is None or slide_count != self.cache_slide_count:
+                self.response_cache = {}
+            else:
+                # The slides list embeds every title, drop it together with the slide
+                self.response_cache = {
+                    key: cached for key, cached in self.response_cache.items()
+                    if key != slide_id and not isinstance(key, tuple)
                 }
-            }
-            
-            showRefreshIndicator() {
-                const indicator = document.getElementById('refreshIndicator');
-                indicator.classList.add('active');
-                setTimeout(() => {
-                    indicator.classList.remove('active');
-                }, 1000);
-            }
-            
-            showError(message) {
-                const container = document.getElementById('slideContent');
-                container.innerHTML = `<div class="error">${message}</div>`;
-            }
-        }
+            self.cache_slide_count = None if not self.response_cache else slide_count
+    
+    def on_content_changed(self, slide_id, slide_data, action='update'):
+        """Handle content changes from main application"""
+        # Update current slide if it was modified
+        if slide_id == self.current_slide_id:
+            logger.debug(f"Web server: Content updated for current slide {slide_id}")
         
-        // Initialize when page loads
-        document.addEventListener('DOMContentLoaded', () => {
-            new BertrandtPresentation();
-        });
-        """
+        self.content_version += 1
+        change_seq = self.record_change(slide_id, action)
+        self.invalidate_response_cache(slide_id if action == 'update' else None)
         
-        self.send_response(200)
-        self.send_header('Content-Type', 'application/javascript')
-        self.send_header('Content-Length', str(len(js_content.encode('utf-8'))))
-        self.end_headers()
-        self.wfile.write(js_content.encode('utf-8'))
+        self._publish_event('content_changed', {
+            'slide_id': slide_id,
+            'action': action,
+            'content_version': self.content_version,
+            'change_seq': change_seq,
+            'total_slides': self.content.get_slide_count()
+        })
     
-    def get_presentation_html(self):
-        """Generate the main presentation HTML page"""
-        return """<!DOCTYPE html>
-<html lang="de">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Bertrandt Präsentation - Tablet View</title>
-    <link rel="stylesheet" href="/static/style.css">
-</head>
-<body>
-    <div class="refresh-indicator" id="refreshIndicator">🔄 Aktualisiert</div>
+    def set_current_slide(self, slide_id):
+        """Set current slide for web interface"""
+        self.current_slide_id = slide_id
+        logger.debug(f"Web server: Current slide set to {slide_id}")
+        
+        self._publish_event('slide_change', {
+            'action': 'set',
+            'slide_id': slide_id,
+            'total_slides': self.content.get_slide_count(),
+            'switch_at': self._next_switch_time()
+        })
     
-    <div class="presentation-container">
-        <div class="header">
-            <div class="logo">🚗 BERTRANDT Dynamic Messe Stand V4</div>
-            <div class="controls">
-                <button class="btn" id="refreshBtn">🔄 Aktualisieren</button>
-                <button class="btn btn-primary" id="playBtn">▶ Demo</button>
-            </div>
-        </div>
+    def next_slide(self):
+        """Handle next slide command from web interface"""
+        # Only the ids are needed, get_all_slides() would copy and check every image
+        max_slide = max(self.content.slides, default=1)
         
-        <div class="slide-container" id="slideContent">
-            <div class="loading">Lädt Präsentation...</div>
-        </div>
+        if self.current_slide_id < max_slide:
+            self.current_slide_id += 1
+            self._queue_navigation('next', self.current_slide_id)
+    
+    def previous_slide(self):
+        """Handle previous slide command from web interface"""
+        if self.current_slide_id > 1:
+            self.current_slide_id -= 1
+            self._queue_navigation('prev', self.current_slide_id)
+    
+    def goto_slide(self, slide_id):
+        """Handle goto slide command from web interface"""
+        if slide_id in self.content.slides:
+            self.current_slide_id = slide_id
+            self._queue_navigation('goto', slide_id)
+    
+    def execute_command(self, action, slide_id=None):
+        """Dispatch a control command from HTTP or WebSocket clients"""
+        if action == 'next':
+            self.next_slide()
+        elif action == 'prev':
+            self.previous_slide()
+        elif action == 'goto':
+            self.goto_slide(slide_id if slide_id is not None else 1)
+        elif action == 'play':
+            self.start_demo()
+        elif action == 'stop':
+            self.stop_demo()
+        else:
+            logger.warning(f"Unknown control command: {action}")
+    
+    def start_demo(self):
+        """Handle start demo command from web interface"""
+        # Deliver merged navigation first, the GUI must see commands in order
+        self._flush_navigation()
+        self._notify_slide_change('play', self.current_slide_id)
+    
+    def stop_demo(self):
+        """Handle stop demo command from web interface"""
+        self._flush_navigation()
+        self._notify_slide_change('stop', self.current_slide_id)
+    
+    def _queue_navigation(self, action, slide_id):
+        """Signal a navigation, merging bursts within the coalesce window into one goto"""
+        with self.navigation_lock:
+            self.pending_navigation = (action, slide_id)
+            self.pending_navigation_count += 1
+            
+            # Trailing edge only: a single tap waits one window, a burst renders just its final slide
+            if self.navigation_timer is None:
+                self._start_navigation_window()
+    
+    def _start_navigation_window(self):
+        """Open a coalesce window (navigation_lock held)"""
+        self.navigation_timer = threading.Timer(
+            config.web['command_coalesce_ms'] / 1000, self._navigation_window_closed)
+        self.navigation_timer.daemon = True
+        self.navigation_timer.start()
+    
+    def _navigation_window_closed(self):
+        """Flush the commands merged during the window"""
+        with self.navigation_lock:
+            self.navigation_timer = None
         
-        <div class="navigation">
-            <div class="slide-info" id="slideInfo">Folie 1 von 1</div>
-            <div class="nav-buttons">
-                <button class="btn" id="prevBtn">◀ Zurück</button>
-                <button class="btn" id="nextBtn">Weiter ▶</button>
-            </div>
-        </div>
-    </div>
+        self._flush_navigation()
     
-    <script src="/static/script.js"></script>
-</body>
-</html>"""
+    def _flush_navigation(self):
+        """Publish the pending navigation, only the final slide of a burst"""
+        # Serialized so an older flush can never overtake a newer one
+        with self.navigation_flush_lock:
+            with self.navigation_lock:
+                pending = self.pending_navigation
+                merged = self.pending_navigation_count
+                self.pending_navigation = None
+                self.pending_navigation_count = 0
+            
+            if pending is None:
+                return
+            
+            action, slide_id = pending
+            if merged > 1:
+                logger.debug(f"Web server: {merged} navigation commands merged into goto {slide_id}")
+                action = 'goto'
+            self._notify_slide_change(action, slide_id)
     
-    def send_404(self):
-        """Send 404 Not Found response"""
-        self.send_response(404)
-        self.send_header('Content-Type', 'text/html')
-        self.end_headers()
-        self.wfile.write(b'<h1>404 Not Found</h1>')
+    def _cancel_navigation_window(self):
+        """Stop the coalesce timer and deliver what is still pending"""
+        with self.navigation_lock:
+            timer = self.navigation_timer
+            self.navigation_timer = None
+        if timer:
+            timer.cancel()
+        self._flush_navigation()
     
-    def send_500(self):
-        """Send 500 Internal Server Error response"""
-        self.send_response(500)
-        self.send_header('Content-Type', 'text/html')
-        self.end_headers()
-        self.wfile.write(b'<h1>500 Internal Server Error</h1>')
+    def _next_switch_time(self):
+        """Server time at which a navigation published now is shown everywhere"""
+        # The lead time covers delivery to every client, they flip together at switch_at
+        self.switch_at = round(server_time_ms() + config.web['switch_lead_ms'], 1)
+        return self.switch_at
     
-    def log_message(self, format, *args):
-        """Override to use our logger instead of stderr"""
-        logger.debug(f"HTTP: {format % args}")
+    def _notify_slide_change(self, action, slide_id):
+        """Notify main application about slide changes from web interface"""
+        switch_at = self._next_switch_time()
+        self._publish_event('slide_change', {
+            'action': action,
+            'slide_id': slide_id,
+            'total_slides': self.content.get_slide_count(),
+            'switch_at': switch_at
+        })
+        
+        if self.slide_change_callbacks:
+            with self.navigation_lock:
+                if self.callback_executor is None:
+                    self.callback_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"room-{self.name}")
+                self.callback_executor.submit(self._run_slide_change_callbacks, action, slide_id, switch_at)
+    
+    def _run_slide_change_callbacks(self, action, slide_id, switch_at):
+        """Run the main display callbacks at switch_at, together with the tablets"""
+        delay = (switch_at - server_time_ms()) / 1000
+        if delay > 0:
+            time.sleep(delay)
+        
+        for callback in self.slide_change_callbacks:
+            try:
+                callback(action, slide_id)
+            except Exception as e:
+                logger.error(f"Error in slide change callback: {e}")
 
 class WebPresentationServer:
     """Main Web Server für Remote-Präsentationen"""
     
-    def __init__(self, host='0.0.0.0', port=8080):
+    def __init__(self, host='0.0.0.0', port=8080, engine=None):
         self.host = host
         self.port = port
+        self.engine = engine or config.web['engine']
         self.server = None
         self.server_thread = None
         self.running = False
-        self.current_slide_id = 1
         
-        # Callbacks für slide control
-        self.slide_change_callbacks = []
+        # Räume (Stände) mit eigener Präsentation, Socket, Worker und Caches teilen sie sich
+        self.rooms = {}
+        self.rooms_lock = threading.Lock()
+        self.default_room = self.add_room(DEFAULT_ROOM, content_manager)
         
-        # Content manager observer hinzufügen
-        content_manager.add_observer(self.on_content_changed)
+        # Statische Assets (HTML/CSS/JS), einmalig beim Start gzip-komprimiert
+        self.static_assets = {}
+        self.fingerprinted_assets = {}
+        self.asset_urls = {}
+        self.build_version = None
+        
+        # Erkannter Content-Type pro Bild, gültig solange mtime und Größe gleich bleiben
+        self.image_types = {}
+        
+        # Gerenderte Slide-PNGs pro (Raum, Slide, Version, Breite), LRU-begrenzt für alle Räume
+        self.render_cache = OrderedDict()
+        self.render_lock = threading.Lock()
+        self.render_stats = {'hits': 0, 'misses': 0}
+        
+        # Token-Bucket pro Client-IP vor allen Steuerbefehlen
+        self.control_limiter = ClientRateLimiter(config.web['control_rate'], config.web['control_burst'])
+    
+    @property
+    def current_slide_id(self):
+        """Current slide of the default room"""
+        return self.default_room.current_slide_id
     
     def add_slide_change_callback(self, callback):
-        """Add callback for slide changes from web interface"""
-        self.slide_change_callbacks.append(callback)
+        """Add callback for slide changes from the default room's web interface"""
+        self.default_room.add_slide_change_callback(callback)
     
-    def on_content_changed(self, slide_id, slide_data, action='update'):
-        """Handle content changes from main application"""
-        # Update current slide if it was modified
-        if slide_id == self.current_slide_id:
-            logger.debug(f"Web server: Content updated for current slide {slide_id}")
+    def set_current_slide(self, slide_id):
+        """Set current slide of the default room"""
+        self.default_room.set_current_slide(slide_id)
+    
+    def add_room(self, name, content=None):
+        """Create a room, by default with its own content store under data/rooms/<name>"""
+        if not ROOM_NAME_PATTERN.match(name):
+            raise ValueError(f"Invalid room name: {name!r}")
+        
+        with self.rooms_lock:
+            if name in self.rooms:
+                raise ValueError(f"Room already exists: {name}")
+            if content is None:
+                content = ContentManager(os.path.join("data", "rooms", name))
+            room = PresentationRoom(name, content, self)
+            self.rooms[name] = room
+        
+        logger.info(f"Web server: Room '{name}' with {content.get_slide_count()} slides")
+        return room
+    
+    def get_room(self, name):
+        """Return a room by name, None if it does not exist"""
+        return self.rooms.get(name)
+    
+    def split_room_path(self, path):
+        """Split /r/<room>/<path> into (room, path), None as room for unknown rooms"""
+        if not path.startswith('/r/'):
+            return self.default_room, path
+        
+        name, _, rest = path[3:].partition('/')
+        return self.rooms.get(name), '/' + rest
+    
+    def get_cached_render(self, key, render):
+        """Look up a rendered PNG in the shared LRU or render() it once and store it"""
+        with self.render_lock:
+            cached = self.render_cache.get(key)
+            if cached is not None:
+                self.render_cache.move_to_end(key)
+                self.render_stats['hits'] += 1
+                return cached
+            self.render_stats['misses'] += 1
+        
+        cached = CachedResponse(render(), 'image/png')
+        
+        with self.render_lock:
+            self.render_cache[key] = cached
+            while len(self.render_cache) > config.web['render_cache_size']:
+                self.render_cache.popitem(last=False)
+        return cached
+    
+    def build_static_assets(self):
+        """Load the tablet CSS and JavaScript from disk, fingerprint them and precompress everything once"""
+        assets = {}
+        fingerprinted = {}
+        asset_urls = {}
+        for name in UNVERSIONED_ASSETS:
+            stem, extension = os.path.splitext(name)
+            asset = CachedResponse(read_static_file(name).encode('utf-8'), STATIC_CONTENT_TYPES[extension])
+            # Content hash in the name: immutable for browsers, a changed file gets a new URL
+            fingerprint = hashlib.blake2b(asset.body, digest_size=6).hexdigest()
+            hashed_name = f"{stem}.{fingerprint}{extension}"
+            assets[name] = fingerprinted[hashed_name] = asset
+            asset_urls[name] = f"/static/{hashed_name}"
+        
+        assets['index.html'] = CachedResponse(
+            PresentationRequestHandler.get_presentation_html(asset_urls).encode('utf-8'), HTML_CONTENT_TYPE)
+        
+        # The service worker cache name follows the shell content, a changed build replaces it
+        build_hash = hashlib.blake2b(digest_size=8)
+        for asset in assets.values():
+            build_hash.update(asset.body)
+        self.build_version = build_hash.hexdigest()
+        service_worker = read_static_file('sw.js').replace('__BUILD_VERSION__', self.build_version).replace(
+            '__STYLE_URL__', asset_urls['style.css']).replace('__SCRIPT_URL__', asset_urls['script.js'])
+        assets['sw.js'] = CachedResponse(service_worker.encode('utf-8'), 'application/javascript; charset=utf-8')
+        
+        for asset in assets.values():
+            asset.compress(level=9)
+        
+        self.static_assets = assets
+        self.fingerprinted_assets = fingerprinted
+        self.asset_urls = asset_urls
+        
+        # Rendered pages reference the asset URLs
+        for room in list(self.rooms.values()):
+            room.invalidate_response_cache()
+        return assets
+    
+    def get_static_asset(self, name):
+        """Return a precompressed static asset"""
+        assets = self.static_assets or self.build_static_assets()
+        return assets[name]
+    
+    def get_asset_urls(self):
+        """Fingerprinted URLs of the tablet CSS and JavaScript"""
+        if not self.asset_urls:
+            self.build_static_assets()
+        return self.asset_urls
+    
+    def get_image_url(self, relative_path):
+        """Web URL of a slide image, the file version in v= changes whenever the creator overwrites it"""
+        quoted_path = quote(relative_path)
+        full_path = self.resolve_image_path(quoted_path)
+        try:
+            stat = os.stat(full_path) if full_path else None
+        except OSError:
+            stat = None
+        # Same version as the image ETag, clients append the variant parameters with '&'
+        version = f"{stat.st_mtime_ns:x}-{stat.st_size:x}" if stat else '0'
+        return f"/api/image/{quoted_path}?v={version}"
+    
+    def resolve_image_path(self, image_path):
+        """Map a request path to a file inside the image directory, None if outside or missing"""
+        base_dir = os.path.realpath(IMAGE_DIR)
+        full_path = os.path.realpath(os.path.join(base_dir, unquote(image_path)))
+        
+        if os.path.commonpath([base_dir, full_path]) != base_dir or not os.path.isfile(full_path):
+            return None
+        return full_path
+    
+    def get_image_content_type(self, path, stat):
+        """Content type of an image file, sniffed once per file version"""
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self.image_types.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+        
+        content_type = detect_content_type(path)
+        self.image_types[path] = (key, content_type)
+        return content_type
     
     def start_server(self):
         """Start the web server"""
@@ -813,12 +1853,36 @@ class WebPresentationServer:
                 logger.warning("Web server is already running")
                 return False
             
-            self.server = ThreadedHTTPServer((self.host, self.port), PresentationRequestHandler)
+            self.build_static_assets()
+            # Fresh buckets per run, picks up changed limits
+            self.control_limiter = ClientRateLimiter(config.web['control_rate'], config.web['control_burst'])
+            
+            for name in config.web['rooms']:
+                if name not in self.rooms:
+                    self.add_room(name)
+            
+            if self.engine == 'pool':
+                self.server = WorkerPoolHTTPServer(
+                    (self.host, self.port), PresentationRequestHandler,
+                    workers=config.web['pool_workers'],
+                    queue_size=config.web['pool_queue_size'],
+                    max_streams=config.web['pool_max_streams']
+                )
+            elif self.engine == 'asyncio':
+                # Imported lazily, the asyncio engine builds on the handler defined here
+                from services.async_web_server import AsyncHTTPServer
+                self.server = AsyncHTTPServer((self.host, self.port), PresentationRequestHandler, self)
+            else:
+                self.server = ThreadedHTTPServer((self.host, self.port), PresentationRequestHandler)
+
+            # Port 0 binds an ephemeral port, report the real one
+            self.port = self.server.server_address[1]
+            
             self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
             self.server_thread.start()
             
             self.running = True
-            logger.info(f"Web presentation server started on http://{self.host}:{self.port}")
+            logger.info(f"Web presentation server started on http://{self.host}:{self.port} ({self.engine})")
             return True
             
         except Exception as e:
@@ -838,10 +1902,16 @@ class WebPresentationServer:
             if self.server_thread and self.server_thread.is_alive():
                 self.server_thread.join(timeout=5)
             
+            image_variants.shutdown()
+            
             self.running = False
             self.server = None
             self.server_thread = None
             
+            # Close open event streams, deliver pending navigation and release long-polls
+            for room in list(self.rooms.values()):
+                room.close()
+            
             logger.info("Web presentation server stopped")
             return True
             
@@ -849,58 +1919,100 @@ class WebPresentationServer:
             logger.error(f"Error stopping web server: {e}")
             return False
     
-    def set_current_slide(self, slide_id):
-        """Set current slide for web interface"""
-        self.current_slide_id = slide_id
-        logger.debug(f"Web server: Current slide set to {slide_id}")
-    
-    def next_slide(self):
-        """Handle next slide command from web interface"""
-        slides = content_manager.get_all_slides()
-        max_slide = max(slides.keys()) if slides else 1
-        
-        if self.current_slide_id < max_slide:
-            self.current_slide_id += 1
-            self._notify_slide_change('next', self.current_slide_id)
-    
-    def previous_slide(self):
-        """Handle previous slide command from web interface"""
-        if self.current_slide_id > 1:
-            self.current_slide_id -= 1
-            self._notify_slide_change('prev', self.current_slide_id)
-    
-    def goto_slide(self, slide_id):
-        """Handle goto slide command from web interface"""
-        slides = content_manager.get_all_slides()
-        if slide_id in slides:
-            self.current_slide_id = slide_id
-            self._notify_slide_change('goto', slide_id)
-    
-    def start_demo(self):
-        """Handle start demo command from web interface"""
-        self._notify_slide_change('play', self.current_slide_id)
-    
-    def stop_demo(self):
-        """Handle stop demo command from web interface"""
-        self._notify_slide_change('stop', self.current_slide_id)
-    
-    def _notify_slide_change(self, action, slide_id):
-        """Notify main application about slide changes from web interface"""
-        for callback in self.slide_change_callbacks:
-            try:
-                callback(action, slide_id)
-            except Exception as e:
-                logger.error(f"Error in slide change callback: {e}")
-    
     def get_server_info(self):
         """Get server information"""
-        return {
+        info = {
             'running': self.running,
+            'engine': self.engine,
             'host': self.host,
             'port': self.port,
             'url': f"http://{self.host}:{self.port}" if self.running else None,
-            'current_slide': self.current_slide_id
+            'current_slide': self.default_room.current_slide_id,
+            'state_version': self.default_room.state_version,
+            'build_version': self.build_version,
+            'response_cache': self.get_response_cache_stats(),
+            'broadcast': self.get_broadcast_stats(),
+            'control_rate_limit': self.control_limiter.get_stats(),
+            'rooms': {name: room.get_info() for name, room in self.rooms.items()}
+        }
+        
+        server = self.server
+        if server is not None and hasattr(server, 'get_pool_stats'):
+            info['worker_pool'] = server.get_pool_stats()
+        if server is not None and hasattr(server, 'get_connection_stats'):
+            info['connections'] = server.get_connection_stats()
+        
+        return info
+    
+    def get_broadcast_stats(self):
+        """Broadcast subscribers and counters summed over all rooms"""
+        stats = {'subscribers': 0, 'events_published': 0, 'deliveries': 0, 'evictions': 0}
+        for room in list(self.rooms.values()):
+            for name, value in room.broadcaster.get_stats().items():
+                stats[name] += value
+        return stats
+    
+    def get_response_cache_stats(self):
+        """Response cache entries, hits and misses summed over all rooms"""
+        rooms = list(self.rooms.values())
+        return {
+            'entries': sum(len(room.response_cache) for room in rooms),
+            'hits': sum(room.cache_stats['hits'] for room in rooms),
+            'misses': sum(room.cache_stats['misses'] for room in rooms)
         }
+    
+    def get_metric_samples(self):
+        """Current (name, type, help, value) samples for /api/metrics, counters end in _total"""
+        cache_stats = self.get_response_cache_stats()
+        broadcast_stats = self.get_broadcast_stats()
+        limiter_stats = self.control_limiter.get_stats()
+        
+        samples = [
+            ('web_threads', 'gauge', 'Live Python threads of the application.', threading.active_count()),
+            ('web_rooms', 'gauge', 'Presentation rooms served by this process.', len(self.rooms)),
+            ('web_state_version', 'gauge', 'Navigation and content state version of the default room.',
+             self.default_room.state_version),
+            ('web_event_subscribers', 'gauge', 'Subscribers of the navigation event buses of all rooms.',
+             broadcast_stats['subscribers']),
+            ('web_broadcast_events_total', 'counter', 'Events published to all rooms.',
+             broadcast_stats['events_published']),
+            ('web_broadcast_deliveries_total', 'counter', 'Events handed to subscriber buffers.',
+             broadcast_stats['deliveries']),
+            ('web_broadcast_evictions_total', 'counter', 'Subscribers dropped for a full buffer.',
+             broadcast_stats['evictions']),
+            ('web_control_commands_allowed_total', 'counter',
+             'Control commands that passed the per-client rate limit.', limiter_stats['allowed']),
+            ('web_control_commands_limited_total', 'counter',
+             'Control commands rejected with 429 by the per-client rate limit.', limiter_stats['limited']),
+            ('web_control_rate_limit_clients', 'gauge', 'Clients with a tracked token bucket.',
+             limiter_stats['clients']),
+            ('web_response_cache_entries', 'gauge', 'Serialized JSON responses in the caches of all rooms.',
+             cache_stats['entries']),
+            # Hit ratios come from the counter rates, a lifetime ratio hides what happens right now
+            ('web_response_cache_hits_total', 'counter', 'Response cache hits.', cache_stats['hits']),
+            ('web_response_cache_misses_total', 'counter', 'Response cache misses.', cache_stats['misses']),
+            ('web_render_cache_entries', 'gauge', 'Rendered slide PNGs in the cache.', len(self.render_cache)),
+            ('web_render_cache_hits_total', 'counter', 'Render cache hits.', self.render_stats['hits']),
+            ('web_render_cache_misses_total', 'counter', 'Render cache misses.', self.render_stats['misses'])
+        ]
+        
+        server = self.server
+        engine_stats = []
+        if server is not None and hasattr(server, 'get_pool_stats'):
+            engine_stats.append(('web_pool', 'Worker pool', server.get_pool_stats()))
+        if server is not None and hasattr(server, 'get_connection_stats'):
+            engine_stats.append(('web_async', 'Async engine', server.get_connection_stats()))
+        
+        for prefix, label, stats in engine_stats:
+            for name, value in stats.items():
+                description = f'{label} {name.replace("_", " ")}.'
+                # rejected_* and evicted_* only ever grow
+                if name.startswith(('rejected_', 'evicted_')):
+                    samples.append((f'{prefix}_{name}_total', 'counter', description, value))
+                else:
+                    samples.append((f'{prefix}_{name}', 'gauge', description, value))
+        
+        return samples
 
 # Global web server instance
 web_server = WebPresentationServer()
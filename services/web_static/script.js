@@ -0,0 +1,629 @@
+class BertrandtPresentation {
+    constructor() {
+        this.currentSlide = 1;
+        this.totalSlides = 1;
+        this.autoRefresh = true;
+        this.refreshInterval = 3000; // retry delay while the server is unreachable
+        this.stateVersion = -1;
+        this.pollGeneration = 0;
+        this.pollActive = false;
+        this.eventSource = null;
+        this.streamInterrupted = false;
+        this.socket = null;
+        this.pendingCommands = new Map();
+        this.commandSeq = 0;
+        this.commandTimeout = 3000;
+        this.imageFormat = this.detectWebp() ? 'webp' : 'jpeg';
+        // ?render=1: show server-rendered bitmaps instead of laying out HTML
+        this.renderMode = new URLSearchParams(window.location.search).has('render');
+        this.bundle = null;
+        this.bundleVersion = -1;
+        this.navigationSeq = 0;
+        this.navigationsPending = 0;
+        this.slideCache = new Map();   // prefetched slides while no bundle is loaded
+        this.imageCache = new Map();   // LRU of decoded Image objects
+        this.imageCacheSize = 24;
+        // /r/<room>/ pages talk to their room, the default room has no prefix
+        const roomMatch = window.location.pathname.match(/^\/r\/[^/]+/);
+        this.apiBase = roomMatch ? roomMatch[0] : '';
+        // Server clock estimate, navigation events name the server time to flip at
+        this.clockOffset = 0;          // server time minus local time in ms
+        this.clockRtt = null;
+        this.clockSamples = 5;
+        this.clockSyncInterval = 300000;
+        this.maxSwitchDelay = 2000;    // further ahead means the clock estimate is off
+        this.switchTimer = null;
+        this.renderedKey = null;       // slide version currently in the DOM
+        this.init();
+    }
+
+    init() {
+        this.syncClock();
+        setInterval(() => this.syncClock(), this.clockSyncInterval);
+        this.hydrate();
+        this.loadCurrentSlide();
+        this.loadBundle();
+        this.setupEventListeners();
+        this.connectEventStream();
+        this.connectWebSocket();
+        this.setupSwipeGestures();
+    }
+
+    connectWebSocket() {
+        if (typeof WebSocket === 'undefined') return;
+
+        const protocol = location.protocol === 'https:' ? 'wss:' : 'ws:';
+        const socket = new WebSocket(`${protocol}//${location.host}${this.apiBase}/ws`);
+
+        socket.onopen = () => {
+            this.socket = socket;
+        };
+
+        socket.onmessage = (e) => {
+            const message = JSON.parse(e.data);
+            const resolve = this.pendingCommands.get(message.id);
+            if (resolve) {
+                this.pendingCommands.delete(message.id);
+                resolve(message);
+            }
+        };
+
+        socket.onclose = () => {
+            if (this.socket === socket) this.socket = null;
+            this.pendingCommands.forEach(resolve => resolve(null));
+            this.pendingCommands.clear();
+            setTimeout(() => this.connectWebSocket(), this.refreshInterval);
+        };
+    }
+
+    hydrate() {
+        // The page arrives with the current slide rendered, take over its state without rebuilding it
+        const element = document.getElementById('initialState');
+        const state = element && JSON.parse(element.textContent);
+        if (!state || !state.slide) return;
+
+        this.currentSlide = state.slide.slide_id;
+        this.totalSlides = state.slide.total_slides;
+        if (!this.renderMode) this.renderedKey = this.renderKey(state.slide);
+        this.updateNavigation();
+        this.prefetchAround(state.slide);
+    }
+
+    localNow() {
+        // Monotonic with sub-millisecond resolution where available
+        return window.performance && performance.timeOrigin
+            ? performance.timeOrigin + performance.now()
+            : Date.now();
+    }
+
+    serverNow() {
+        return this.localNow() + this.clockOffset;
+    }
+
+    async syncClock() {
+        // NTP-style exchange, the sample with the shortest round trip has the tightest error bound
+        let best = null;
+        for (let i = 0; i < this.clockSamples; i++) {
+            try {
+                const sent = this.localNow();
+                const response = await fetch(`${this.apiBase}/api/time`, { cache: 'no-store' });
+                const server = await response.json();
+                const received = this.localNow();
+
+                const rtt = (received - sent) - (server.sent - server.received);
+                const offset = ((server.received - sent) + (server.sent - received)) / 2;
+                if (!best || rtt < best.rtt) best = { rtt, offset };
+            } catch (error) {
+                break;
+            }
+        }
+        if (best) {
+            this.clockOffset = best.offset;
+            this.clockRtt = best.rtt;
+        }
+    }
+
+    scheduleSwitch(switchAt, apply) {
+        // Flip at server time switchAt, together with the other tablets and the main display
+        clearTimeout(this.switchTimer);
+        const delay = switchAt ? switchAt - this.serverNow() : 0;
+        if (delay > 0 && delay < this.maxSwitchDelay) {
+            this.switchTimer = setTimeout(apply, delay);
+        } else {
+            apply();
+        }
+    }
+
+    sendSocketCommand(data) {
+        return new Promise((resolve) => {
+            const id = ++this.commandSeq;
+            this.pendingCommands.set(id, resolve);
+            this.socket.send(JSON.stringify(Object.assign({ id }, data)));
+
+            setTimeout(() => {
+                if (this.pendingCommands.delete(id)) resolve(null);
+            }, this.commandTimeout);
+        });
+    }
+
+    connectEventStream() {
+        if (typeof EventSource === 'undefined') {
+            this.startAutoRefresh();
+            return;
+        }
+
+        this.eventSource = new EventSource(`${this.apiBase}/api/events`);
+
+        this.eventSource.onopen = () => {
+            this.stopAutoRefresh();
+            if (this.streamInterrupted) {
+                // Changes may have been missed while reconnecting
+                this.streamInterrupted = false;
+                this.loadCurrentSlide();
+                this.syncClock();
+            }
+        };
+
+        this.eventSource.onerror = () => {
+            this.streamInterrupted = true;
+            this.startAutoRefresh();
+
+            if (this.eventSource.readyState === EventSource.CLOSED) {
+                // Browser gave up reconnecting, try again later
+                this.eventSource = null;
+                setTimeout(() => this.connectEventStream(), this.refreshInterval * 5);
+            }
+        };
+
+        this.eventSource.addEventListener('slide_change', (e) => {
+            const data = JSON.parse(e.data);
+            // Own commands in flight: their answer settles the final slide
+            if (this.navigationsPending > 0) return;
+            // Fetch during the lead time, show at switch_at
+            if (!this.getCachedSlide(data.slide_id)) this.prefetchSlide(data.slide_id);
+            this.scheduleSwitch(data.switch_at, () => {
+                if (this.navigationsPending > 0) return;
+                if (data.slide_id !== this.currentSlide && !this.showCachedSlide(data.slide_id)) {
+                    this.loadCurrentSlide();
+                }
+            });
+        });
+
+        this.eventSource.addEventListener('content_changed', (e) => {
+            const data = JSON.parse(e.data);
+            if (data.content_version !== this.bundleVersion) {
+                this.slideCache.clear();
+                this.loadBundle();
+            }
+            if (data.slide_id === this.currentSlide || data.action !== 'update') {
+                this.loadCurrentSlide();
+            }
+        });
+    }
+
+    setupEventListeners() {
+        // Navigation buttons
+        document.getElementById('prevBtn').addEventListener('click', () => this.previousSlide());
+        document.getElementById('nextBtn').addEventListener('click', () => this.nextSlide());
+        document.getElementById('playBtn').addEventListener('click', () => this.toggleDemo());
+        document.getElementById('refreshBtn').addEventListener('click', () => this.loadCurrentSlide());
+
+        // Keyboard navigation
+        document.addEventListener('keydown', (e) => {
+            switch(e.key) {
+                case 'ArrowLeft':
+                    this.previousSlide();
+                    break;
+                case 'ArrowRight':
+                case ' ':
+                    this.nextSlide();
+                    break;
+                case 'Home':
+                    this.gotoSlide(1);
+                    break;
+                case 'End':
+                    this.gotoSlide(this.totalSlides);
+                    break;
+            }
+        });
+    }
+
+    setupSwipeGestures() {
+        let startX, startY, endX, endY;
+        const slideContainer = document.querySelector('.slide-container');
+
+        slideContainer.addEventListener('touchstart', (e) => {
+            startX = e.touches[0].clientX;
+            startY = e.touches[0].clientY;
+        });
+
+        slideContainer.addEventListener('touchend', (e) => {
+            if (!startX || !startY) return;
+
+            endX = e.changedTouches[0].clientX;
+            endY = e.changedTouches[0].clientY;
+
+            const deltaX = startX - endX;
+            const deltaY = startY - endY;
+
+            // Horizontal swipe
+            if (Math.abs(deltaX) > Math.abs(deltaY)) {
+                if (Math.abs(deltaX) > 50) { // Minimum swipe distance
+                    if (deltaX > 0) {
+                        this.nextSlide(); // Swipe left = next
+                    } else {
+                        this.previousSlide(); // Swipe right = previous
+                    }
+                }
+            }
+
+            startX = startY = endX = endY = null;
+        });
+    }
+
+    async loadCurrentSlide() {
+        try {
+            this.showRefreshIndicator();
+            const response = await fetch(`${this.apiBase}/api/current_slide`);
+            const version = parseInt(response.headers.get('X-State-Version'), 10);
+            const data = await response.json();
+
+            if (data.error) {
+                this.showError(data.error);
+                return;
+            }
+
+            if (!isNaN(version)) this.stateVersion = version;
+            this.applySlideData(data);
+
+        } catch (error) {
+            console.error('Error loading slide:', error);
+            this.showError('Verbindungsfehler beim Laden der Folie');
+        }
+    }
+
+    applySlideData(data) {
+        this.currentSlide = data.slide_id;
+        this.totalSlides = data.total_slides;
+        this.renderSlide(data);
+        this.updateNavigation();
+        this.prefetchAround(data);
+    }
+
+    async loadBundle() {
+        try {
+            // ETag revalidation keeps repeated loads cheap
+            const response = await fetch(`${this.apiBase}/api/bundle`);
+            const bundle = await response.json();
+            this.bundle = new Map(bundle.slides.map(slide => [slide.slide_id, slide]));
+            this.bundleVersion = bundle.version;
+        } catch (error) {
+            // Navigation falls back to server round trips
+            console.error('Error loading bundle:', error);
+            this.bundle = null;
+        }
+    }
+
+    getCachedSlide(slideId) {
+        return (this.bundle && this.bundle.get(slideId)) || this.slideCache.get(slideId);
+    }
+
+    showCachedSlide(slideId) {
+        const data = this.getCachedSlide(slideId);
+        if (!data) return false;
+        this.applySlideData(data);
+        return true;
+    }
+
+    rememberLru(cache, key, value, limit) {
+        // Map keeps insertion order, re-inserting marks an entry as recently used
+        cache.delete(key);
+        cache.set(key, value);
+        while (cache.size > limit) {
+            cache.delete(cache.keys().next().value);
+        }
+    }
+
+    prefetchAround(slideData) {
+        const slideId = slideData.slide_id;
+        this.slideImages(slideData).forEach(image => this.prefetchImage(image));
+
+        // Direct neighbours right away, the next ring once the browser is idle
+        this.prefetchSlide(slideId + 1);
+        this.prefetchSlide(slideId - 1);
+
+        const idle = window.requestIdleCallback || ((callback) => setTimeout(callback, 500));
+        idle(() => {
+            if (this.currentSlide !== slideId) return;
+            this.prefetchSlide(slideId + 2);
+            this.prefetchSlide(slideId - 2);
+        });
+    }
+
+    async prefetchSlide(slideId) {
+        if (slideId < 1 || slideId > this.totalSlides) return;
+
+        let data = this.getCachedSlide(slideId);
+        if (!data) {
+            try {
+                const response = await fetch(`${this.apiBase}/api/slide?id=${slideId}`);
+                data = await response.json();
+                if (data.error) return;
+                this.rememberLru(this.slideCache, slideId, data, this.imageCacheSize);
+            } catch (error) {
+                // Prefetching is best effort
+                return;
+            }
+        }
+        this.slideImages(data).forEach(image => this.prefetchImage(image));
+    }
+
+    slideImages(slideData) {
+        // The exact image requests renderSlide will make for this slide
+        if (this.renderMode) {
+            return [{ src: this.renderUrl(slideData) }];
+        }
+        return (slideData.canvas_elements || [])
+            .filter(el => el.type === 'image' && el.web_url)
+            .map(el => ({ src: el.web_url, srcset: this.buildSrcset(el), sizes: '200px' }));
+    }
+
+    prefetchImage(descriptor) {
+        const key = `${descriptor.src}|${descriptor.srcset || ''}`;
+        let image = this.imageCache.get(key);
+
+        if (!image) {
+            image = new Image();
+            if (descriptor.srcset) {
+                image.sizes = descriptor.sizes;
+                image.srcset = descriptor.srcset;
+            }
+            image.src = descriptor.src;
+            // Decode ahead of time so showing the slide costs no decode work
+            if (image.decode) image.decode().catch(() => this.imageCache.delete(key));
+        }
+        this.rememberLru(this.imageCache, key, image, this.imageCacheSize);
+    }
+
+    async loadSlide(slideId) {
+        try {
+            const response = await fetch(`${this.apiBase}/api/slide?id=${slideId}`);
+            const data = await response.json();
+
+            if (data.error) {
+                this.showError(data.error);
+                return;
+            }
+
+            this.currentSlide = data.slide_id;
+            this.renderSlide(data);
+            this.updateNavigation();
+
+        } catch (error) {
+            console.error('Error loading slide:', error);
+            this.showError('Fehler beim Laden der Folie');
+        }
+    }
+
+    detectWebp() {
+        // Browsers that can encode WebP can also decode it
+        const canvas = document.createElement('canvas');
+        canvas.width = canvas.height = 1;
+        return canvas.toDataURL('image/webp').startsWith('data:image/webp');
+    }
+
+    buildSrcset(img, format = this.imageFormat) {
+        // Server-side resized variants, the browser picks one for its pixel density
+        // web_url is already encoded and carries the file version (?v=)
+        return (img.web_widths || [])
+            .map(width => `${img.web_url}&w=${width}&fmt=${format} ${width}w`)
+            .join(', ');
+    }
+
+    renderUrl(slideData) {
+        // Same pixels as the main display, the timestamp busts the cache on edits
+        const container = document.getElementById('slideContent');
+        const width = Math.round(container.clientWidth * (window.devicePixelRatio || 1));
+        const version = encodeURIComponent(slideData.timestamp || '');
+        return `${this.apiBase}/api/slide/${slideData.slide_id}/render.png?w=${width}&v=${version}`;
+    }
+
+    renderKey(slideData) {
+        return `${slideData.slide_id}|${slideData.timestamp}`;
+    }
+
+    escapeHtml(text) {
+        // Same escaping as html.escape() in render_slide_html
+        const entities = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;' };
+        return String(text).replace(/[&<>"']/g, char => entities[char]);
+    }
+
+    renderSlide(slideData) {
+        // Same slide version as on screen, e.g. the server-rendered first paint: keep the DOM
+        const key = this.renderKey(slideData);
+        if (key === this.renderedKey) return;
+        this.renderedKey = key;
+
+        const container = document.getElementById('slideContent');
+
+        if (this.renderMode) {
+            container.innerHTML = `<img src="${this.renderUrl(slideData)}" class="slide-render" alt="Folie ${slideData.slide_id}">`;
+            return;
+        }
+
+        let imagesHtml = '';
+        if (slideData.canvas_elements) {
+            const imageElements = slideData.canvas_elements.filter(el => el.type === 'image' && el.web_url);
+            if (imageElements.length > 0) {
+                imagesHtml = '<div class="slide-images">';
+                imageElements.forEach(img => {
+                    // Same <picture> as render_slide_html, the browser picks the format as after hydration
+                    const src = this.escapeHtml(img.web_url);
+                    const webp = this.escapeHtml(this.buildSrcset(img, 'webp'));
+                    const jpeg = this.escapeHtml(this.buildSrcset(img, 'jpeg'));
+                    imagesHtml += `<picture><source type="image/webp" srcset="${webp}" sizes="200px">` +
+                        `<img src="${src}" srcset="${jpeg}" sizes="200px" class="slide-image" alt="Slide Image"></picture>`;
+                });
+                imagesHtml += '</div>';
+            }
+        }
+
+        // No whitespace between the tags, the markup matches the server-rendered first paint
+        container.innerHTML = '<div class="slide-content">' +
+            `<h1 class="slide-title">${this.escapeHtml(slideData.title || 'Untitled')}</h1>` +
+            `<div class="slide-text">${this.escapeHtml(slideData.content || '')}</div>` +
+            imagesHtml +
+            '</div>';
+    }
+
+    updateNavigation() {
+        document.getElementById('slideInfo').textContent = 
+            `Folie ${this.currentSlide} von ${this.totalSlides}`;
+
+        document.getElementById('prevBtn').disabled = this.currentSlide <= 1;
+        document.getElementById('nextBtn').disabled = this.currentSlide >= this.totalSlides;
+    }
+
+    async sendCommand(action, slideId = null) {
+        // Only the answer to the latest command may change the display
+        const navigation = ++this.navigationSeq;
+        this.navigationsPending++;
+        try {
+            const data = { action };
+            if (slideId !== null) data.slide = slideId;
+
+            if (this.socket && this.socket.readyState === WebSocket.OPEN) {
+                // The acknowledgement already carries the new slide state
+                const ack = await this.sendSocketCommand(data);
+                if (navigation !== this.navigationSeq) return;
+                if (ack && ack.status === 'success' && ack.slide) {
+                    this.stateVersion = ack.version;
+                    this.applySlideData(ack.slide);
+                } else {
+                    // Command failed or may not have arrived, just resync
+                    this.loadCurrentSlide();
+                }
+                return;
+            }
+
+            const response = await fetch(`${this.apiBase}/api/control`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify(data)
+            });
+
+            await response.json();
+            // Also after a rejected command (429), the optimistic slide may be wrong
+            if (navigation === this.navigationSeq) {
+                this.loadCurrentSlide();
+            }
+
+        } catch (error) {
+            console.error('Error sending command:', error);
+        } finally {
+            this.navigationsPending--;
+        }
+    }
+
+    navigateTo(slideId, action) {
+        // Show the bundled slide at once, the server follows asynchronously
+        if (this.showCachedSlide(slideId)) {
+            this.sendCommand('goto', slideId);
+        } else {
+            this.sendCommand(action, action === 'goto' ? slideId : null);
+        }
+    }
+
+    previousSlide() {
+        if (this.currentSlide > 1) {
+            this.navigateTo(this.currentSlide - 1, 'prev');
+        }
+    }
+
+    nextSlide() {
+        if (this.currentSlide < this.totalSlides) {
+            this.navigateTo(this.currentSlide + 1, 'next');
+        }
+    }
+
+    gotoSlide(slideId) {
+        if (slideId >= 1 && slideId <= this.totalSlides) {
+            this.navigateTo(slideId, 'goto');
+        }
+    }
+
+    toggleDemo() {
+        // Toggle demo mode (start/stop)
+        this.sendCommand('play');
+    }
+
+    startAutoRefresh() {
+        if (this.autoRefresh && !this.pollActive) {
+            this.pollActive = true;
+            this.pollForChanges(++this.pollGeneration);
+        }
+    }
+
+    stopAutoRefresh() {
+        this.pollActive = false;
+        this.pollGeneration++;
+    }
+
+    async pollForChanges(generation) {
+        // Long-poll: the server answers as soon as the state version moves on
+        while (generation === this.pollGeneration) {
+            try {
+                const response = await fetch(`${this.apiBase}/api/current_slide?since=${this.stateVersion}`);
+                const version = parseInt(response.headers.get('X-State-Version'), 10);
+                const switchAt = parseFloat(response.headers.get('X-Switch-At'));
+                // A 400 answers in plain text
+                const data = await response.json().catch(() => ({ error: 'Fehler beim Laden der Folie' }));
+
+                if (generation !== this.pollGeneration) break;
+                // Error answers move the version on too, an old since would return at once again
+                const changed = Number.isFinite(version) && version !== this.stateVersion;
+                if (Number.isFinite(version)) this.stateVersion = version;
+
+                if (!response.ok || data.error) {
+                    if (changed && this.navigationsPending === 0) {
+                        this.showError(data.error || 'Fehler beim Laden der Folie');
+                    }
+                    await new Promise(resolve => setTimeout(resolve, this.refreshInterval));
+                    continue;
+                }
+                if (changed) {
+                    if (this.navigationsPending > 0) continue;
+                    this.scheduleSwitch(switchAt, () => {
+                        if (this.navigationsPending > 0) return;
+                        this.showRefreshIndicator();
+                        this.applySlideData(data);
+                    });
+                }
+            } catch (error) {
+                console.error('Long-poll failed:', error);
+                await new Promise(resolve => setTimeout(resolve, this.refreshInterval));
+            }
+        }
+    }
+
+    showRefreshIndicator() {
+        const indicator = document.getElementById('refreshIndicator');
+        indicator.classList.add('active');
+        setTimeout(() => {
+            indicator.classList.remove('active');
+        }, 1000);
+    }
+
+    showError(message) {
+        this.renderedKey = null;
+        const container = document.getElementById('slideContent');
+        container.innerHTML = `<div class="error">${message}</div>`;
+    }
+}
+
+// Initialize when page loads
+document.addEventListener('DOMContentLoaded', () => {
+    new BertrandtPresentation();
+});
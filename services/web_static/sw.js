@@ -0,0 +1,73 @@
+const CACHE_PREFIX = 'bertrandt-';
+const SHELL_CACHE = `${CACHE_PREFIX}shell-__BUILD_VERSION__`;
+const IMAGE_CACHE = `${CACHE_PREFIX}images-__BUILD_VERSION__`;
+const SHELL_URLS = ['/', '__STYLE_URL__', '__SCRIPT_URL__'];
+const IMAGE_CACHE_LIMIT = 200;
+
+self.addEventListener('install', (event) => {
+    event.waitUntil(
+        caches.open(SHELL_CACHE)
+            .then(cache => cache.addAll(SHELL_URLS))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', (event) => {
+    // Drop the caches of previous server builds
+    event.waitUntil(
+        caches.keys()
+            .then(names => Promise.all(names
+                .filter(name => name.startsWith(CACHE_PREFIX) && name !== SHELL_CACHE && name !== IMAGE_CACHE)
+                .map(name => caches.delete(name))))
+            .then(() => self.clients.claim())
+    );
+});
+
+function isImageRequest(url) {
+    // Only versioned URLs (v= is the file or slide version) may be served from the cache
+    if (!url.searchParams.has('v')) return false;
+    return url.pathname.startsWith('/api/image/') || /^(\/r\/[^/]+)?\/api\/slide\/\d+\/render\.png$/.test(url.pathname);
+}
+
+async function trimCache(cache) {
+    // Cache keys keep insertion order, drop the oldest images first
+    const keys = await cache.keys();
+    for (let i = 0; i < keys.length - IMAGE_CACHE_LIMIT; i++) {
+        await cache.delete(keys[i]);
+    }
+}
+
+async function serveImage(request) {
+    const cache = await caches.open(IMAGE_CACHE);
+    const cached = await cache.match(request);
+    if (cached) return cached;
+
+    const response = await fetch(request);
+    // An edited image gets a new v=, so a cached URL never goes stale; only complete responses are stored
+    if (response.status === 200) {
+        await cache.put(request, response.clone());
+        trimCache(cache);
+    }
+    return response;
+}
+
+self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    const url = new URL(request.url);
+    if (request.method !== 'GET' || url.origin !== self.location.origin) return;
+
+    if (request.mode === 'navigate') {
+        // Pages carry the current slide of their room, the cached page is only the offline fallback
+        event.respondWith(
+            fetch(request).catch(() => caches.match('/', { cacheName: SHELL_CACHE }))
+        );
+    } else if (SHELL_URLS.includes(url.pathname)) {
+        // Static shell of this build, the network is only the fallback
+        event.respondWith(
+            caches.match(url.pathname, { cacheName: SHELL_CACHE }).then(cached => cached || fetch(request))
+        );
+    } else if (isImageRequest(url) && !request.headers.has('Range')) {
+        event.respondWith(serveImage(request));
+    }
+    // State JSON, event stream and WebSocket always go to the network
+});
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+WebSocket-Protokoll (RFC 6455) für die Tablet-Fernsteuerung
+Minimale Server-Implementierung auf Basis der Standardbibliothek
+"""
+
+import asyncio
+import base64
+import hashlib
+import struct
+import threading
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+OPCODE_CONTINUATION = 0x0
+OPCODE_TEXT = 0x1
+OPCODE_BINARY = 0x2
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+# Control messages from tablets are tiny, anything larger is rejected
+MAX_MESSAGE_SIZE = 64 * 1024
+
+class WebSocketError(Exception):
+    """Protocol violation or unexpectedly closed connection"""
+
+def compute_accept_key(key):
+    """Compute the Sec-WebSocket-Accept value for a handshake key"""
+    digest = hashlib.sha1((key.strip() + WEBSOCKET_GUID).encode('ascii')).digest()
+    return base64.b64encode(digest).decode('ascii')
+
+def encode_frame(payload, opcode=OPCODE_TEXT):
+    """Build a single unmasked server-to-client frame"""
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+
+    header = bytearray([0x80 | opcode])
+    length = len(payload)
+    if length < 126:
+        header.append(length)
+    elif length < 0x10000:
+        header.append(126)
+        header += struct.pack('!H', length)
+    else:
+        header.append(127)
+        header += struct.pack('!Q', length)
+
+    return bytes(header) + payload
+
+def parse_frame_header(head):
+    """Parse the first two frame bytes, returns (fin, opcode, masked, length)"""
+    fin = bool(head[0] & 0x80)
+    if head[0] & 0x70:
+        raise WebSocketError("Reserved bits set without negotiated extension")
+
+    opcode = head[0] & 0x0F
+    masked = bool(head[1] & 0x80)
+    length = head[1] & 0x7F
+
+    if opcode >= OPCODE_CLOSE and (not fin or length > 125):
+        raise WebSocketError("Invalid control frame")
+
+    return fin, opcode, masked, length
+
+def unmask(payload, mask):
+    """Apply the 4-byte client mask to a payload"""
+    if not payload:
+        return b''
+
+    # XOR the whole payload at once instead of byte by byte
+    repeated = (mask * (len(payload) // 4 + 1))[:len(payload)]
+    value = int.from_bytes(payload, 'big') ^ int.from_bytes(repeated, 'big')
+    return value.to_bytes(len(payload), 'big')
+
+def read_frame(read_exact):
+    """Read one client frame via read_exact(n), returns (fin, opcode, payload)"""
+    fin, opcode, masked, length = parse_frame_header(read_exact(2))
+
+    if length == 126:
+        length = struct.unpack('!H', read_exact(2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', read_exact(8))[0]
+
+    if not masked:
+        raise WebSocketError("Client frames must be masked")
+    if length > MAX_MESSAGE_SIZE:
+        raise WebSocketError(f"Frame too large: {length} bytes")
+
+    mask = read_exact(4)
+    return fin, opcode, unmask(read_exact(length), mask)
+
+async def read_frame_async(read_exact):
+    """asyncio variant of read_frame, read_exact is a coroutine function"""
+    fin, opcode, masked, length = parse_frame_header(await read_exact(2))
+
+    if length == 126:
+        length = struct.unpack('!H', await read_exact(2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', await read_exact(8))[0]
+
+    if not masked:
+        raise WebSocketError("Client frames must be masked")
+    if length > MAX_MESSAGE_SIZE:
+        raise WebSocketError(f"Frame too large: {length} bytes")
+
+    mask = await read_exact(4)
+    return fin, opcode, unmask(await read_exact(length), mask)
+
+class MessageAssembler:
+    """Reassembles fragmented data frames into complete messages"""
+
+    def __init__(self):
+        self.message = bytearray()
+        self.message_opcode = None
+
+    def feed(self, fin, opcode, payload):
+        """Add a data frame, returns the complete message once the last fragment arrived"""
+        if opcode == OPCODE_CONTINUATION:
+            if self.message_opcode is None:
+                raise WebSocketError("Continuation frame without message")
+        elif opcode in (OPCODE_TEXT, OPCODE_BINARY):
+            if self.message_opcode is not None:
+                raise WebSocketError("New message before previous one finished")
+            self.message_opcode = opcode
+        else:
+            raise WebSocketError(f"Unknown opcode {opcode}")
+
+        self.message += payload
+        if len(self.message) > MAX_MESSAGE_SIZE:
+            raise WebSocketError("Message too large")
+        if not fin:
+            return None
+
+        message = self.message
+        message_opcode = self.message_opcode
+        self.message = bytearray()
+        self.message_opcode = None
+
+        if message_opcode == OPCODE_TEXT:
+            return message.decode('utf-8')
+        return bytes(message)
+
+class WebSocketConnection:
+    """Server side of an upgraded WebSocket connection"""
+
+    def __init__(self, rfile, wfile):
+        self.rfile = rfile
+        self.wfile = wfile
+        self.send_lock = threading.Lock()
+        self.closed = False
+
+    def _read_exact(self, size):
+        """Read exactly size bytes or fail"""
+        data = self.rfile.read(size)
+        if len(data) < size:
+            raise WebSocketError("Connection closed by client")
+        return data
+
+    def _send_frame(self, frame):
+        """Write a complete frame, serialized against other writers"""
+        with self.send_lock:
+            if self.closed:
+                raise WebSocketError("Connection already closed")
+            self.wfile.write(frame)
+
+    def send_text(self, text):
+        """Send a text message"""
+        self._send_frame(encode_frame(text, OPCODE_TEXT))
+
+    def receive(self):
+        """Return the next complete message, or None once the client closed"""
+        assembler = MessageAssembler()
+
+        while True:
+            fin, opcode, payload = read_frame(self._read_exact)
+
+            if opcode == OPCODE_CLOSE:
+                self.close()
+                return None
+            if opcode == OPCODE_PING:
+                self._send_frame(encode_frame(payload, OPCODE_PONG))
+                continue
+            if opcode == OPCODE_PONG:
+                continue
+
+            message = assembler.feed(fin, opcode, payload)
+            if message is not None:
+                return message
+
+    def close(self, status=1000):
+        """Send a close frame (once) and mark the connection closed"""
+        with self.send_lock:
+            if self.closed:
+                return
+            self.closed = True
+            try:
+                self.wfile.write(encode_frame(struct.pack('!H', status), OPCODE_CLOSE))
+            except OSError:
+                pass
+
+class AsyncWebSocketConnection:
+    """asyncio variant of WebSocketConnection on a StreamReader/StreamWriter pair"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.closed = False
+
+    async def _read_exact(self, size):
+        """Read exactly size bytes or fail"""
+        try:
+            return await self.reader.readexactly(size)
+        except asyncio.IncompleteReadError:
+            raise WebSocketError("Connection closed by client")
+
+    async def _send_frame(self, frame):
+        """Write a complete frame and wait for the socket buffer"""
+        if self.closed:
+            raise WebSocketError("Connection already closed")
+        self.writer.write(frame)
+        await self.writer.drain()
+
+    async def send_text(self, text):
+        """Send a text message"""
+        await self._send_frame(encode_frame(text, OPCODE_TEXT))
+
+    async def receive(self):
+        """Return the next complete message, or None once the client closed"""
+        assembler = MessageAssembler()
+
+        while True:
+            fin, opcode, payload = await read_frame_async(self._read_exact)
+
+            if opcode == OPCODE_CLOSE:
+                await self.close()
+                return None
+            if opcode == OPCODE_PING:
+                await self._send_frame(encode_frame(payload, OPCODE_PONG))
+                continue
+            if opcode == OPCODE_PONG:
+                continue
+
+            message = assembler.feed(fin, opcode, payload)
+            if message is not None:
+                return message
+
+    async def close(self, status=1000):
+        """Send a close frame (once) and mark the connection closed"""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.writer.write(encode_frame(struct.pack('!H', status), OPCODE_CLOSE))
+            await self.writer.drain()
+        except OSError:
+            pass